@@ -1,3 +1,4 @@
 from .functions import *  # noqa
 from .indexes import *  # noqa
 from .lookups import *  # noqa
+from .querysets import *  # noqa
@@ -0,0 +1,112 @@
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .functions import Score
+from .querystring import QueryStringError
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which doesn't run an exact `COUNT(*)` over the whole result set:
+    unfiltered tables use the row estimate of the planner statistics, other
+    querysets are counted up to `count_limit` rows.
+    """
+
+    def __init__(self, *args, count_limit=1000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_limit = count_limit
+
+    def _estimated_count(self):
+        queryset = self.object_list
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1 when the table was never vacuumed nor analyzed
+        return row[0] if row and row[0] >= 0 else None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimated_count()
+            if estimate is not None:
+                return estimate
+        return queryset.order_by()[: self.count_limit].count()
+
+
+class ParadeDBSearchAdminMixin:
+    """
+    ModelAdmin mixin searching the `search_fields` with their BM25 index
+    instead of `icontains` lookups, optionally sorting the results by score,
+    and paginating the changelist with an estimated count.
+
+    class BookAdmin(ParadeDBSearchAdminMixin, admin.ModelAdmin):
+        search_fields = ["title", "description"]
+        search_rank = True
+
+    Searches on fields across multi-valued relations aren't ranked: the
+    changelist removes their duplicates with a subquery, dropping the score.
+    """
+
+    search_lookup = "term_search"
+    search_rank = False
+    search_count_limit = 1000
+    show_full_result_count = False
+
+    def _search_field_names(self, request):
+        # ^, = and @ prefixes of search_fields make no sense with a BM25 index
+        return [name.lstrip("^=@") for name in self.get_search_fields(request)]
+
+    def _may_have_duplicates(self, request):
+        return any(
+            lookup_spawns_duplicates(self.opts, name)
+            for name in self._search_field_names(request)
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        field_names = self._search_field_names(request)
+        if not field_names or not search_term.strip():
+            return queryset, False
+
+        condition = Q()
+        for name in field_names:
+            condition |= Q(**{f"{name}__{self.search_lookup}": search_term})
+        try:
+            queryset = queryset.filter(condition)
+            # some lookups only validate their input when compiled
+            queryset.query.sql_with_params()
+        except QueryStringError:
+            return queryset.none(), False
+
+        may_have_duplicates = self._may_have_duplicates(request)
+        if self.search_rank and not may_have_duplicates:
+            queryset = queryset.annotate(search_score=Score())
+        return queryset, may_have_duplicates
+
+    def get_ordering(self, request):
+        if (
+            self.search_rank
+            and self.get_search_fields(request)
+            and not self._may_have_duplicates(request)
+            and request.GET.get(SEARCH_VAR, "").strip()
+        ):
+            return ["-search_score"]
+        return super().get_ordering(request)
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        return EstimatedCountPaginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            count_limit=self.search_count_limit,
+        )
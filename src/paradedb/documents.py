@@ -0,0 +1,302 @@
+"""
+Denormalized search documents.
+
+Searching across related models, e.g. items whose reviews mention a term,
+needs a join between two BM25 scans. A `SearchDocument` gathers the fields of
+a model and of its relations into a shadow table with a BM25 index of its
+own, so that a single index scan answers the query:
+
+    class ItemDocument(SearchDocument):
+        source = models.OneToOneField(Item, models.CASCADE, primary_key=True)
+        name = models.TextField()
+        description = models.TextField()
+        reviews = models.TextField()
+
+        search_fields = {
+            "name": "name",
+            "description": "description",
+            "reviews": "review__review",  # every review, concatenated
+        }
+
+        class Meta:
+            indexes = [
+                BM25Index(
+                    fields=["name", "description", "reviews"],
+                    name="item_document_idx",
+                )
+            ]
+
+    Item.objects.filter(itemdocument__reviews__term_search="great")
+
+`search_fields` maps the fields of the document to lookup paths from the
+source model, paths spanning a many relation are concatenated, in the order
+of their values. With "paradedb" in INSTALLED_APPS, documents are refreshed on
+commit whenever the source, or a related model used in a path, is saved or
+deleted, changes made in the same transaction are refreshed in one batch.
+The source objects of the related ones saved are looked up in that batch too,
+or read from their foreign key to the source model; updates also read their
+previous source object beforehand. Bulk changes which don't send signals
+(`update()`, `bulk_create()`, raw SQL) need a call to `ItemDocument.refresh()`.
+"""
+
+import threading
+
+import django
+from django.apps import apps
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import models, router, transaction
+from django.db.models import F, Value
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .querysets import ParadeDBManager
+
+
+_pending = threading.local()
+
+# the ordering argument of StringAgg was renamed in Django 5.2
+_AGG_ORDER_BY = "order_by" if django.VERSION >= (5, 2) else "ordering"
+
+
+def _path_fields(model, path):
+    # the fields along a lookup path
+    fields = []
+    for name in path.split("__"):
+        field = model._meta.get_field(name)
+        fields.append(field)
+        model = field.related_model
+    return fields
+
+
+class SearchDocument(models.Model):
+    """
+    Abstract base of the search documents, subclasses declare a `source`
+    one-to-one primary key to the source model, their text fields and
+    `search_fields`.
+    """
+
+    search_fields = {}
+
+    objects = ParadeDBManager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def source_model(cls):
+        return cls._meta.get_field("source").related_model
+
+    @classmethod
+    def _is_many(cls, path):
+        return any(
+            f.many_to_many or f.one_to_many
+            for f in _path_fields(cls.source_model(), path)
+        )
+
+    @classmethod
+    def refresh(cls, pks=None, batch_size=1000, using=None):
+        """
+        Rebuilds the documents of the source objects with the given primary
+        keys, all of them by default, `batch_size` at a time. Documents of
+        deleted source objects are removed.
+        """
+        source = cls.source_model()
+        using = using or router.db_for_write(cls)
+        if pks is None:
+            pks = source._default_manager.using(using).values_list("pk", flat=True)
+            cls._default_manager.using(using).exclude(
+                source__in=source._default_manager.using(using).all()
+            ).delete()
+        pks = list(pks)
+        for start in range(0, len(pks), batch_size):
+            cls._refresh_batch(pks[start : start + batch_size], using)
+
+    @classmethod
+    def _refresh_batch(cls, pks, using):
+        source = cls.source_model()
+        sources = source._default_manager.using(using).filter(pk__in=pks)
+
+        # one query for the single valued fields, one per many relation, so
+        # that concatenations don't multiply each other's rows
+        single = {
+            name: F(path)
+            for name, path in cls.search_fields.items()
+            if not cls._is_many(path)
+        }
+        rows = {
+            row.pop("pk"): row
+            for row in sources.order_by().values(
+                "pk", **{f"_{n}": e for n, e in single.items()}
+            )
+        }
+        for name, path in cls.search_fields.items():
+            if name in single:
+                continue
+            values = (
+                sources.order_by()
+                .values("pk")
+                .annotate(
+                    value=StringAgg(
+                        path,
+                        delimiter="\n",
+                        default=Value(""),
+                        **{_AGG_ORDER_BY: path},
+                    )
+                )
+            )
+            for row in values:
+                rows[row["pk"]][f"_{name}"] = row["value"]
+
+        documents = [
+            cls(
+                source_id=pk,
+                **{name: row.get(f"_{name}") or "" for name in cls.search_fields},
+            )
+            for pk, row in rows.items()
+        ]
+        with transaction.atomic(using=using):
+            cls._default_manager.using(using).filter(source__in=pks).exclude(
+                source__in=list(rows)
+            ).delete()
+            cls._default_manager.using(using).bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=["source"],
+                update_fields=list(cls.search_fields),
+            )
+
+    @classmethod
+    def schedule_refresh(cls, pks, using, related=None):
+        """
+        Refreshes the documents when the current transaction commits, together
+        with the others scheduled in the same transaction. `related` maps
+        paths of `search_fields` to primary keys of the objects at their end,
+        whose source objects are looked up at commit.
+        """
+        if not pks and not related:
+            return
+        if not hasattr(_pending, "pks"):
+            _pending.pks = {}
+            _pending.related = {}
+        key = (cls, using)
+        _pending.pks.setdefault(key, set()).update(pks)
+        for path, related_pks in (related or {}).items():
+            _pending.related.setdefault(key, {}).setdefault(path, set()).update(
+                related_pks
+            )
+
+        def flush():
+            # the first callback to run refreshes every pending document
+            pks = _pending.pks.pop(key, set())
+            for path, related_pks in _pending.related.pop(key, {}).items():
+                pks |= cls._affected(path, related_pks, using)
+            if pks:
+                cls.refresh(pks, using=using)
+
+        transaction.on_commit(flush, using=using)
+
+    @classmethod
+    def _dependencies(cls):
+        # (model, path from the source model to it) for every related model
+        # used in search_fields, "" for the source model itself
+        source = cls.source_model()
+        dependencies = {(source, "")}
+        for path in cls.search_fields.values():
+            names = path.split("__")
+            for i, field in enumerate(_path_fields(source, path)):
+                if field.is_relation:
+                    dependencies.add((field.related_model, "__".join(names[: i + 1])))
+        return dependencies
+
+    @classmethod
+    def _source_fk(cls, path):
+        # attname of the foreign key of the model at the end of path to the
+        # source model, e.g. "item_id" for "review": the affected source
+        # object is then known without a query
+        fields = _path_fields(cls.source_model(), path) if path else []
+        if len(fields) == 1 and not fields[0].concrete and not fields[0].many_to_many:
+            return fields[0].field.attname
+        return None
+
+    @classmethod
+    def _affected(cls, path, pks, using):
+        # primary keys of the source objects related to the objects at the end
+        # of path with the given primary keys
+        if not path:
+            return set(pks)
+        return set(
+            cls.source_model()
+            ._default_manager.using(using)
+            .filter(**{f"{path}__in": pks})
+            .values_list("pk", flat=True)
+        )
+
+    @classmethod
+    def connect_signals(cls):
+        """
+        Keeps the documents in sync with the models they are built from,
+        called by the paradedb app for every SearchDocument.
+        """
+        for model, path in cls._dependencies():
+            uid = f"paradedb.documents.{cls._meta.label}.{path}"
+            source_fk = cls._source_fk(path)
+
+            def before(
+                sender, instance, raw=False, using=None, uid=uid, path=path, **kwargs
+            ):
+                # rows related before the change, e.g. the previous item of a
+                # review being moved to another one
+                if raw or instance.pk is None or instance._state.adding:
+                    return
+                pks = cls._affected(path, [instance.pk], using)
+                instance.__dict__.setdefault("_search_document_pks", {})[uid] = pks
+
+            def before_delete(
+                sender,
+                instance,
+                using=None,
+                uid=uid,
+                source_fk=source_fk,
+                **kwargs,
+            ):
+                # deleting doesn't change the foreign key, no need to read it
+                pks = {getattr(instance, source_fk)} - {None}
+                instance.__dict__.setdefault("_search_document_pks", {})[uid] = pks
+
+            def after(
+                sender,
+                instance,
+                raw=False,
+                using=None,
+                uid=uid,
+                path=path,
+                source_fk=source_fk,
+                **kwargs,
+            ):
+                if raw:
+                    return
+                pks = instance.__dict__.get("_search_document_pks", {}).pop(uid, set())
+                related = None
+                if kwargs.get("signal") is post_save:
+                    if not path:
+                        pks = pks | {instance.pk}
+                    elif source_fk:
+                        pks = pks | ({getattr(instance, source_fk)} - {None})
+                    else:
+                        related = {path: {instance.pk}}
+                cls.schedule_refresh(pks, using, related)
+
+            pre_save.connect(before, sender=model, weak=False, dispatch_uid=uid)
+            pre_delete.connect(
+                before_delete if source_fk else before,
+                sender=model,
+                weak=False,
+                dispatch_uid=uid,
+            )
+            post_save.connect(after, sender=model, weak=False, dispatch_uid=uid)
+            post_delete.connect(after, sender=model, weak=False, dispatch_uid=uid)
+
+
+def connect_search_documents():
+    for model in apps.get_models():
+        if issubclass(model, SearchDocument):
+            model.connect_signals()
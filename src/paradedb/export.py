@@ -0,0 +1,111 @@
+"""
+Streaming exports of (large) search results.
+
+Rows are read with a server-side cursor, `chunk_size` rows at a time, as plain
+tuples rather than model instances, so memory stays bounded whatever the size
+of the result set:
+
+    from paradedb.export import export_csv
+
+    with open("ids.csv", "w", newline="") as f:
+        export_csv(
+            Book.objects.filter(description__term_search="dragons"),
+            f,
+            "id",
+            "title",
+            highlight="description",
+        )
+"""
+
+import csv
+import json
+
+from django.core.exceptions import EmptyResultSet
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models.expressions import Col
+
+from .functions import Highlight
+
+
+def _values_list(queryset, fields, highlight):
+    fields = list(fields or ["pk"])
+    if highlight is not None:
+        if not isinstance(highlight, Highlight):
+            highlight = Highlight(highlight)
+        queryset = queryset.annotate(highlight=highlight)
+        fields.append("highlight")
+    return queryset.values_list(*fields), fields
+
+
+def iter_rows(queryset, *fields, highlight=None, chunk_size=2000):
+    """
+    Yields a tuple of the values of `fields` (the primary key by default) for
+    every row of `queryset`. With `highlight`, a field name or a `Highlight`,
+    the snippet is appended to every tuple.
+    """
+    values, _ = _values_list(queryset, fields, highlight)
+    yield from values.iterator(chunk_size=chunk_size)
+
+
+def export_csv(
+    queryset, fileobj, *fields, highlight=None, chunk_size=2000, header=True
+):
+    """
+    Writes the rows of `iter_rows()` to the text file `fileobj` as CSV, after
+    a header row of the field names unless `header` is False.
+    """
+    values, names = _values_list(queryset, fields, highlight)
+    writer = csv.writer(fileobj)
+    if header:
+        writer.writerow(names)
+    for row in values.iterator(chunk_size=chunk_size):
+        writer.writerow(row)
+
+
+def export_jsonl(queryset, fileobj, *fields, highlight=None, chunk_size=2000):
+    """
+    Writes the rows of `iter_rows()` to the text file `fileobj` as JSON
+    Lines, one object keyed by the field names per row.
+    """
+    values, names = _values_list(queryset, fields, highlight)
+    for row in values.iterator(chunk_size=chunk_size):
+        fileobj.write(
+            json.dumps(dict(zip(names, row, strict=True)), cls=DjangoJSONEncoder)
+        )
+        fileobj.write("\n")
+
+
+def copy_to(queryset, fileobj, *fields, highlight=None, header=True):
+    """
+    Writes the rows as CSV with `COPY (SELECT ...) TO STDOUT`: Postgres formats
+    the rows itself, nothing goes through Python objects. The SQL is compiled
+    for the database the queryset reads from, a queryset which can't match
+    anything, e.g. `filter(pk__in=[])`, only writes the header.
+    """
+    values, _ = _values_list(queryset, fields, highlight)
+    compiler = values.query.get_compiler(using=queryset.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        if header:
+            csv.writer(fileobj, lineterminator="\n").writerow(_column_names(compiler))
+        return
+    with connections[queryset.db].cursor() as cursor:
+        query = cursor.mogrify(sql, params)
+        if isinstance(query, bytes):
+            query = query.decode()
+        cursor.copy_expert(
+            "COPY (%s) TO STDOUT WITH (FORMAT csv%s)"
+            % (query, ", HEADER" if header else ""),
+            fileobj,
+        )
+
+
+def _column_names(compiler):
+    # the names Postgres gives the columns of the SELECT in a COPY header
+    return [
+        alias
+        or (expression.target.column if isinstance(expression, Col) else "?column?")
+        for expression, _, alias in compiler.select
+    ]
@@ -0,0 +1,94 @@
+"""
+Scatter-gather searches over models sharded across several databases.
+
+`search()` runs the same search, best matches first, on every database alias
+concurrently, and merges the results into a global top `k` by score:
+
+    from paradedb import federated
+
+    results = federated.search(
+        Book,
+        aliases=["books_eu", "books_us", "books_apac"],
+        query=Q(description__term_search="dragons"),
+        k=20,
+        timeout=0.5,
+    )
+    for book in results:
+        book.score, book._state.db
+
+Shards which fail or don't answer within `timeout` seconds are left out:
+`results.errors` maps their alias to the exception, and `results.partial` is
+True. Scores are computed by the index of every shard, with its own term
+statistics, so shards should hold similar content for them to compare.
+"""
+
+import heapq
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import connections
+from django.db.models import Q
+
+from .functions import Score
+
+
+class FederatedResults(list):
+    def __init__(self, hits, errors):
+        super().__init__(hits)
+        self.errors = errors
+
+    @property
+    def partial(self):
+        return bool(self.errors)
+
+
+def _search_shard(model, alias, query, k, timeout):
+    try:
+        qs = model._default_manager.using(alias).filter(query)
+        if "score" not in qs.query.annotations:
+            qs = qs.annotate(score=Score())
+        qs = qs.order_by("-score")[:k]
+        if timeout is not None and hasattr(qs, "search_options"):
+            # cancel the query rather than leave it running after the timeout
+            qs = qs.search_options(statement_timeout_ms=max(1, int(timeout * 1000)))
+        return list(qs)
+    finally:
+        # every worker thread has its own connection
+        connections[alias].close()
+
+
+def search(model, aliases, query, k=10, timeout=None, max_workers=None):
+    """
+    The `k` best matches of `query` (a Q object or a dict of lookups) among
+    the `model` rows of every database in `aliases`, annotated with their
+    `score`. See the module documentation for `timeout`.
+    """
+    if isinstance(query, dict):
+        query = Q(**query)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(aliases))
+    start = time.monotonic()
+    futures = {
+        executor.submit(_search_shard, model, alias, query, k, timeout): alias
+        for alias in aliases
+    }
+    done, not_done = wait(futures, timeout=timeout)
+    # don't wait for the shards which timed out
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    shards, errors = [], {}
+    for future in done:
+        alias = futures[future]
+        if future.exception() is not None:
+            errors[alias] = future.exception()
+        else:
+            shards.append(future.result())
+    for future in not_done:
+        errors[futures[future]] = TimeoutError(
+            f"No answer after {time.monotonic() - start:.3f}s"
+        )
+
+    # every shard is sorted by score already
+    hits = heapq.merge(*shards, key=lambda hit: hit.score, reverse=True)
+    return FederatedResults(itertools.islice(hits, k), errors)
@@ -1,4 +1,4 @@
-from django.db.models import CharField, FloatField
+from django.db.models import BooleanField, CharField, F, FloatField
 from django.db.models.expressions import Func
 
 
@@ -19,10 +19,9 @@ class Score(Func):
 
     output_field = FloatField()
 
-    def as_sql(self, compiler, connection, **extra_context):
+    def table_alias(self, compiler):
         # This is mighty nasty.
         _table_name = compiler.query.model._meta.db_table
-        _field_name = compiler.query.model._meta.pk.name
         if self._field is not None and "__" in self._field:
             for table_name, ds in compiler.query.alias_map.items():
                 if hasattr(ds, "join_field") and self._field.startswith(
@@ -30,7 +29,11 @@ class Score(Func):
                 ):
                     _table_name = table_name
                     break
+        return _table_name
 
+    def as_sql(self, compiler, connection, **extra_context):
+        _table_name = self.table_alias(compiler)
+        _field_name = compiler.query.model._meta.pk.name
         return f"pdb.score({_table_name}.{_field_name})", []
 
 
@@ -59,3 +62,57 @@ class Highlight(Func):
             f"start_tag => %s, end_tag => %s, "
             f"max_num_chars => %s)"
         ), [self._start_tag, self._end_tag, self._max_num_chars]
+
+
+class MoreLikeThis(Func):
+    """
+    https://docs.paradedb.com/documentation/advanced/specialized/more_like_this
+
+    Matches the rows similar to the document with primary key `document_pk`,
+    based on the terms of its indexed `fields` (all of them by default).
+
+    SELECT * FROM mock_items
+    WHERE id @@@ paradedb.more_like_this(
+        document_id => 3, min_term_frequency => 1, max_query_terms => 12
+    );
+    """
+
+    output_field = BooleanField()
+    conditional = True
+
+    options = {
+        "min_term_freq": "min_term_frequency",
+        "min_doc_freq": "min_doc_frequency",
+        "max_doc_freq": "max_doc_frequency",
+        "max_query_terms": "max_query_terms",
+        "min_word_length": "min_word_length",
+        "max_word_length": "max_word_length",
+        "boost_factor": "boost_factor",
+        "stop_words": "stop_words",
+    }
+
+    def __init__(self, document_pk, fields=None, **options):
+        unknown = set(options) - set(self.options)
+        if unknown:
+            raise TypeError(
+                "Unexpected MoreLikeThis options: %s" % ", ".join(sorted(unknown))
+            )
+        self._document_pk = document_pk
+        self._fields = list(fields or [])
+        self._options = options
+        super().__init__(F("pk"))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        key_sql, key_params = compiler.compile(self.source_expressions[0])
+        args, params = ["document_id => %s"], [self._document_pk]
+        for name, value in self._options.items():
+            if value is not None:
+                args.append(f"{self.options[name]} => %s")
+                params.append(value)
+        if self._fields:
+            args.append("fields => %s::text[]")
+            params.append(self._fields)
+        return (
+            f"{key_sql} @@@ paradedb.more_like_this({', '.join(args)})",
+            (*key_params, *params),
+        )
@@ -1,19 +1,118 @@
 import json
 
 from django.contrib.postgres.indexes import PostgresIndex
+from django.db.models import CharField, TextField
 
 
 class BM25Index(PostgresIndex):
+    """
+    https://docs.paradedb.com/documentation/indexing/create_index
+
+    Partial indexes are declared with the usual `condition=Q(...)`, search
+    lookups on the indexed fields then add the same predicate to their WHERE
+    clause so the planner can pick the index.
+
+    On partitioned tables, pass the names of the partitions in `partitions`:
+    the index is then created on the parent table only, one index named
+    `<partition>_bm25_idx` is created on every partition and attached to it.
+    For list partitioned tables, e.g. by tenant, `partition_field` names the
+    partition key and `partitions` maps every partition to its value(s), so
+    that searches can target or fan out to the partitions, see
+    `ParadeDBQuerySet.for_partition()` and `top_k_by_partition()`.
+
+    JSON columns listed in `fields` are indexed as JSON fields, options such as
+    the tokenizer or `fast` can be set per column with
+    `json_fields={"metadata": {"fast": False}}`. Text fields are indexed as
+    fast fields by default, `text_fields={"description": {"fast": False}}`
+    overrides their options the same way. `stemmer=None` disables stemming.
+    Only text and JSON fields using the raw or keyword tokenizer, e.g.
+    `text_fields={"isbn": {"tokenizer": {"type": "raw"}}}`, can be sorted on
+    and read from the index.
+    """
+
     suffix = "bm25"
 
     def __init__(self, *expressions, **kwargs):
         self._key_field = kwargs.pop("key_field", None)
         self._stemmer = kwargs.pop("stemmer", "English")
+        partitions = kwargs.pop("partitions", None) or []
+        self._partitions = (
+            dict(partitions) if isinstance(partitions, dict) else list(partitions)
+        )
+        self._partition_field = kwargs.pop("partition_field", None)
+        json_fields = kwargs.pop("json_fields", None) or {}
+        if not isinstance(json_fields, dict):
+            json_fields = {name: {} for name in json_fields}
+        self._json_fields = json_fields
+        self._text_fields = kwargs.pop("text_fields", None) or {}
         super().__init__(*expressions, **kwargs)
 
+    def deconstruct(self):
+        path, expressions, kwargs = super().deconstruct()
+        if self._key_field:
+            kwargs["key_field"] = self._key_field
+        if self._stemmer != "English":
+            kwargs["stemmer"] = self._stemmer
+        if self._partitions:
+            kwargs["partitions"] = self._partitions
+        if self._partition_field:
+            kwargs["partition_field"] = self._partition_field
+        if self._json_fields:
+            kwargs["json_fields"] = self._json_fields
+        if self._text_fields:
+            kwargs["text_fields"] = self._text_fields
+        return path, expressions, kwargs
+
     def _get_tokenizer(self):
+        if self._stemmer is None:
+            return {"type": "default"}
         return {"type": "default", "stemmer": self._stemmer}
 
+    def has_field(self, name):
+        return name in self.fields or name in self._json_fields
+
+    def is_fast_field(self, model, name):
+        # text and JSON fields are indexed as fast unless configured otherwise,
+        # but their values are tokenized unless the raw or keyword tokenizer is
+        # used. ParadeDB makes numeric, boolean and date fields fast by default
+        if name in self._json_fields:
+            options = self._json_fields[name]
+        elif name in self.fields and isinstance(
+            model._meta.get_field(name), (CharField, TextField)
+        ):
+            options = self._text_fields.get(name, {})
+        else:
+            return name in self.fields or name == self._key_field
+        tokenizer = options.get("tokenizer", self._get_tokenizer())
+        return options.get("fast", True) and tokenizer["type"] in ("raw", "keyword")
+
+    @property
+    def partition_field(self):
+        return self._partition_field
+
+    def partition_values(self):
+        # {partition: [values of the partition key]}, for list partitions
+        if not isinstance(self._partitions, dict):
+            return {}
+        return {
+            partition: list(values) if isinstance(values, (list, tuple)) else [values]
+            for partition, values in self._partitions.items()
+        }
+
+    def partition_for(self, value):
+        """
+        Name of the partition holding the rows with `partition_field` equal to
+        `value`, None if unknown.
+        """
+        for partition, values in self.partition_values().items():
+            if value in values:
+                return partition
+        return None
+
+    @staticmethod
+    def partition_index_name(partition):
+        return f"{partition}_bm25_idx"
+
     def create_sql(self, model, schema_editor, using="", **kwargs):
         self.check_supported(schema_editor)
         if self._key_field:
@@ -24,11 +123,16 @@ class BM25Index(PostgresIndex):
         if (_id_field_name, "") not in self.fields_orders:
             self.fields_orders.insert(0, (_id_field_name, ""))
 
+        for name in self._json_fields:
+            if (name, "") not in self.fields_orders:
+                self.fields_orders.append((name, ""))
+
         statement = super().create_sql(
             model, schema_editor, using=" %s " % (using or self.suffix), **kwargs
         )
 
         text_fields = {}
+        json_fields = {}
 
         for f in model._meta.fields:
             name, db_type = f.name, f.db_type(schema_editor.connection)
@@ -38,15 +142,65 @@ class BM25Index(PostgresIndex):
                 text_fields[name] = {
                     "fast": True,
                     "tokenizer": self._get_tokenizer(),
+                    **self._text_fields.get(name, {}),
+                }
+            elif self.has_field(name) and db_type in ("json", "jsonb"):
+                json_fields[name] = {
+                    "fast": True,
+                    "tokenizer": self._get_tokenizer(),
+                    **self._json_fields.get(name, {}),
                 }
 
-        statement.parts["extra"] = " WITH (key_field='%s', text_fields='%s')" % (
-            _id_field_name,
+        statement.parts["extra"] = " WITH (key_field='%s', text_fields='%s'" % (
+            model._meta.get_field(_id_field_name).column,
             json.dumps(text_fields),
         )
+        if json_fields:
+            statement.parts["extra"] += ", json_fields='%s'" % json.dumps(json_fields)
+        statement.parts["extra"] += ")"
+
+        if self._partitions:
+            self._add_partitions_sql(statement, schema_editor)
         return statement
 
+    def _add_partitions_sql(self, statement, schema_editor):
+        # Postgres can't build an index on the parent of a partitioned table,
+        # create it on the parent only, then build one index per partition and
+        # attach it to the parent one.
+        create_template = statement.template
+        statements = [create_template.replace(" ON %(table)s", " ON ONLY %(table)s")]
+        for i, partition in enumerate(self._partitions):
+            name_key, table_key = f"partition_name_{i}", f"partition_table_{i}"
+            statement.parts[name_key] = schema_editor.quote_name(
+                self.partition_index_name(partition)
+            )
+            statement.parts[table_key] = schema_editor.quote_name(partition)
+            statements.append(
+                create_template.replace("%(name)s", f"%({name_key})s").replace(
+                    "%(table)s", f"%({table_key})s"
+                )
+            )
+            statements.append(f"ALTER INDEX %(name)s ATTACH PARTITION %({name_key})s")
+        statement.template = "; ".join(statements)
+
 
 class BM25NgramIndex(BM25Index):
+    def __init__(self, *expressions, min_gram=2, max_gram=3, **kwargs):
+        self._min_gram = min_gram
+        self._max_gram = max_gram
+        super().__init__(*expressions, **kwargs)
+
+    def deconstruct(self):
+        path, expressions, kwargs = super().deconstruct()
+        if (self._min_gram, self._max_gram) != (2, 3):
+            kwargs["min_gram"] = self._min_gram
+            kwargs["max_gram"] = self._max_gram
+        return path, expressions, kwargs
+
     def _get_tokenizer(self):
-        return {"type": "ngram", "min_gram": 2, "max_gram": 3, "prefix_only": False}
+        return {
+            "type": "ngram",
+            "min_gram": self._min_gram,
+            "max_gram": self._max_gram,
+            "prefix_only": False,
+        }
@@ -1,7 +1,15 @@
-from django.db.models import Field, Lookup
-from django.db.models.lookups import PostgresOperatorLookup
 import ast
 
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Field, JSONField, Lookup, Transform
+from django.db.models.lookups import In, PostgresOperatorLookup
+from django.db.models.sql.query import Query
+from django.db.models.sql.where import WhereNode
+
+from . import querystring
+from .indexes import BM25Index
+
+
 def _db_col_from_lhs(lhs):
     leaf = getattr(lhs, "target", None) or getattr(lhs, "field", None)
     return (leaf.column if leaf is not None else lhs.source.name)
@@ -11,18 +19,108 @@ def _model_from_lhs(lhs):
     leaf = getattr(lhs, "target", None) or getattr(lhs, "field", None)
     return getattr(leaf, "model", None)
 
+def _col_from_lhs(lhs):
+    # unwrap transforms down to the column they apply to
+    while not hasattr(lhs, "alias") and hasattr(lhs, "lhs"):
+        lhs = lhs.lhs
+    return lhs
+
+def _bm25_index_for_model(model, field_name=None):
+    # the BM25Index declared on the model, preferably the one covering field_name
+    indexes = [i for i in model._meta.indexes if isinstance(i, BM25Index)]
+    for index in indexes:
+        if field_name is None or index.has_field(field_name):
+            return index
+    return indexes[0] if indexes else None
+
 def _bm25_index_name_for_model(model):
+    index = _bm25_index_for_model(model)
+    if index is not None:
+        return index.name
     # default convention: <table_name>_bm25_idx
     tbl = model._meta.db_table  # may be "schema.table" or just "table"
     base = tbl.split(".")[-1]
     return f"{base}_bm25_idx".strip().strip('"').strip("'")
 
+def _key_field_sql(col, compiler, connection):
+    # the key_field column of the BM25 index, on the same alias as col
+    model = _model_from_lhs(col)
+    index = _bm25_index_for_model(model)
+    key_field = model._meta.pk
+    if index is not None and index._key_field:
+        key_field = model._meta.get_field(index._key_field)
+    return "%s.%s" % (
+        compiler.quote_name_unless_alias(col.alias),
+        connection.ops.quote_name(key_field.column),
+    )
+
+def _bm25_condition_sql(lhs, compiler, connection):
+    # compile the condition of a partial BM25Index against the alias of lhs
+    col = _col_from_lhs(lhs)
+    model = _model_from_lhs(col)
+    leaf = getattr(col, "target", None) or getattr(col, "field", None)
+    if model is None or leaf is None:
+        return None, ()
+    index = _bm25_index_for_model(model, leaf.name)
+    if index is None or index.condition is None:
+        return None, ()
+    where = Query(model).build_where(index.condition)
+    alias = getattr(col, "alias", None)
+    if alias and alias != model._meta.db_table:
+        where = where.relabeled_clone({model._meta.db_table: alias})
+    return compiler.compile(where)
+
+
+def _is_negated(where, lookup, negated=False):
+    # whether lookup is under an odd number of negated nodes of where, None
+    # if it isn't in where
+    negated ^= where.negated
+    for child in where.children:
+        if child is lookup:
+            return negated
+        if isinstance(child, WhereNode):
+            found = _is_negated(child, lookup, negated)
+            if found is not None:
+                return found
+    return None
+
+
+def _with_bm25_condition(lookup, sql, params, compiler, connection):
+    # the search AND the condition of its partial index. Under exclude(), the
+    # search OR NOT the condition: the NOT around it then gives the rows of
+    # the index which don't match, rather than every row outside the index
+    condition_sql, condition_params = _bm25_condition_sql(
+        lookup.lhs, compiler, connection
+    )
+    if not condition_sql:
+        return sql, params
+    if _is_negated(compiler.query.where, lookup):
+        sql = f"({sql} OR NOT ({condition_sql}))"
+    else:
+        sql = f"({sql} AND {condition_sql})"
+    return sql, (*params, *condition_params)
+
+
+class PartialIndexMixin:
+    """
+    Adds the condition of a partial BM25Index to the search predicate, so the
+    planner can prove the query only targets indexed rows and use the index.
+    """
+
+    def as_postgresql(self, compiler, connection):
+        as_sql = getattr(super(), "as_postgresql", self.as_sql)
+        sql, params = as_sql(compiler, connection)
+        return _with_bm25_condition(self, sql, params, compiler, connection)
+
+
 @Field.register_lookup
-class QuerySearchLookup(Lookup):
+class QuerySearchLookup(PartialIndexMixin, Lookup):
     lookup_name = "query_search"
     def as_sql(self, compiler, connection):
         lhs_sql, lhs_params = self.process_lhs(compiler, connection)
         text = getattr(self.rhs, "value", self.rhs)       # <<< read raw, no process_rhs
+        text = querystring.normalize_terms(text)
+        querystring.parse(text)  # malformed queries fail before the database
         db_col = _db_col_from_lhs(self.lhs)
         sql = (
             f"({lhs_sql}) @@@ "
@@ -32,7 +130,7 @@ class QuerySearchLookup(Lookup):
         return sql, params
 
 @Field.register_lookup
-class BoostSearchLookup(Lookup):
+class BoostSearchLookup(PartialIndexMixin, Lookup):
     lookup_name = "boost_search"
     def as_sql(self, compiler, connection):
         lhs_sql, lhs_params = self.process_lhs(compiler, connection)
@@ -45,6 +143,8 @@ class BoostSearchLookup(Lookup):
 
         if isinstance(text, (list, tuple)):              # guard nested tuple
             text = text[0]
+        text = querystring.normalize_terms(text)
+        querystring.parse(text)  # malformed queries fail before the database
         db_col = _db_col_from_lhs(self.lhs)
         model = _model_from_lhs(self.lhs)
         index_name = _bm25_index_name_for_model(model)
@@ -56,39 +156,151 @@ class BoostSearchLookup(Lookup):
         return sql, params
 
 
+class Fuzzy:
+    """
+    A fuzzy search value with options, for the `fuzzy_search`,
+    `fuzzy_term_search` and `fuzzy_phrase_search` lookups:
+
+    Item.objects.filter(name__fuzzy_term_search=Fuzzy("muzik", distance=1))
+
+    `distance` is the maximum Levenshtein distance (0 to 2), a transposition
+    counts as one edit unless `transposition_cost_one` is False, and `prefix`
+    matches terms starting with the search terms.
+
+    With `adaptive=True`, the search first probes for exact matches, then for
+    matches at distance 1, and so on up to `distance`, and runs at the first
+    distance finding at least `min_hits` rows, in the same SQL statement.
+    Correctly spelled searches then don't pay for the expensive distances.
+    """
+
+    def __init__(
+        self,
+        text,
+        distance=2,
+        transposition_cost_one=True,
+        prefix=False,
+        adaptive=False,
+        min_hits=1,
+    ):
+        distance = int(distance)
+        if not 0 <= distance <= 2:
+            raise ValueError(f"Fuzzy distance must be 0, 1 or 2, not {distance}")
+        if int(min_hits) < 1:
+            raise ValueError("min_hits must be at least 1")
+        self.text = text
+        self.distance = distance
+        self.transposition_cost_one = bool(transposition_cost_one)
+        self.prefix = bool(prefix)
+        self.adaptive = bool(adaptive)
+        self.min_hits = int(min_hits)
+
+    def __repr__(self):
+        return f"Fuzzy({self.text!r}, distance={self.distance})"
+
+    @property
+    def escalates(self):
+        return self.adaptive and self.distance > 0
+
+
+def _adaptive_guards(lookup, fuzzy, search, compiler, connection):
+    # the conditions under which an adaptive search runs at each distance, 0
+    # to fuzzy.distance: the probes of the smaller distances found fewer than
+    # min_hits rows, and the probe of this one found them. search(distance)
+    # gives the search predicate; a probe runs it in an uncorrelated subquery
+    # the planner evaluates once, and stops at min_hits rows. The probes use
+    # the alias of the searched column, so its references resolve to the
+    # probed table rather than to the outer query.
+    col = _col_from_lhs(lookup.lhs)
+    table = connection.ops.quote_name(_model_from_lhs(col)._meta.db_table)
+    alias = compiler.quote_name_unless_alias(col.alias)
+    from_sql = table if alias == table else f"{table} {alias}"
+    condition_sql, condition_params = _bm25_condition_sql(
+        lookup.lhs, compiler, connection
+    )
+
+    guards, misses, miss_params = [], [], []
+    for distance in range(fuzzy.distance):
+        search_sql, search_params = search(distance)
+        probe_params = list(search_params)
+        if condition_sql:
+            search_sql = f"{search_sql} AND {condition_sql}"
+            probe_params += condition_params
+        probe = (
+            f"EXISTS (SELECT 1 FROM {from_sql} WHERE {search_sql} "
+            f"LIMIT 1 OFFSET {fuzzy.min_hits - 1})"
+        )
+        guards.append((" AND ".join([*misses, probe]), [*miss_params, *probe_params]))
+        misses.append(f"NOT {probe}")
+        miss_params += probe_params
+    guards.append((" AND ".join(misses), miss_params))
+    return guards
+
+
+def _adaptive_search_sql(lookup, fuzzy, search, compiler, connection):
+    # (guard_0 AND search_0) OR (guard_1 AND search_1) OR ..., every search
+    # with a constant distance
+    branches, params = [], []
+    guards = _adaptive_guards(lookup, fuzzy, search, compiler, connection)
+    for distance, (guard_sql, guard_params) in enumerate(guards):
+        search_sql, search_params = search(distance)
+        branches.append(f"({guard_sql} AND {search_sql})")
+        params += [*guard_params, *search_params]
+    return "(%s)" % " OR ".join(branches), params
+
+
 @Field.register_lookup
-class FuzzySearchLookup(Lookup):
+class FuzzySearchLookup(PartialIndexMixin, Lookup):
     lookup_name = "fuzzy_search"
 
-    def as_sql(self, compiler, connection):
-        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+    def get_prep_lookup(self):
+        if isinstance(self.rhs, Fuzzy):
+            return self.rhs
+        return super().get_prep_lookup()
+
+    def get_fuzzy(self):
         rhs = getattr(self.rhs, "value", self.rhs)
 
         # Allow `(query, distance)` like `boost_search` accepts tuples.
-        if not isinstance(rhs, (list, tuple)):
+        if not isinstance(rhs, (list, tuple, Fuzzy)):
             try:
                 rhs = ast.literal_eval(rhs)
             except (ValueError, SyntaxError):
                 rhs = (rhs, 2)
 
-        if isinstance(rhs, (list, tuple)):
-            text = rhs[0]
-            distance = rhs[1] if len(rhs) > 1 else 2
+        if isinstance(rhs, Fuzzy):
+            fuzzy = rhs
+        elif isinstance(rhs, (list, tuple)):
+            fuzzy = Fuzzy(rhs[0], rhs[1] if len(rhs) > 1 else 2)
         else:
-            text = rhs
-            distance = 2
+            fuzzy = Fuzzy(rhs)
+        return fuzzy
 
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        fuzzy = self.get_fuzzy()
+
+        text = fuzzy.text
         if isinstance(text, (list, tuple)):
             text = text[0]
 
-        distance = int(distance)
+        text = querystring.normalize_terms(text)
+
+        def search(distance):
+            # pdb.fuzzy(distance, prefix, transposition_cost_one)
+            modifiers = [str(distance)]
+            if fuzzy.prefix or not fuzzy.transposition_cost_one:
+                modifiers.append("t" if fuzzy.prefix else "f")
+                modifiers.append("t" if fuzzy.transposition_cost_one else "f")
+            sql = f"({lhs_sql}) &&& %s::pdb.fuzzy({', '.join(modifiers)})"
+            return sql, tuple(lhs_params) + (text,)
+
+        if fuzzy.escalates:
+            return _adaptive_search_sql(self, fuzzy, search, compiler, connection)
+        return search(fuzzy.distance)
+
 
-        sql = f"({lhs_sql}) &&& %s::pdb.fuzzy({distance})"
-        params = tuple(lhs_params) + (text,)
-        return sql, params
-    
 @Field.register_lookup
-class BaseParadeDBLookup(PostgresOperatorLookup):
+class BaseParadeDBLookup(PartialIndexMixin, PostgresOperatorLookup):
     """
     https://docs.paradedb.com/documentation/full-text/overview#basic-usage
 
@@ -104,22 +316,7 @@ class BaseParadeDBLookup(PostgresOperatorLookup):
 
     def get_prep_lookup(self):
         rhs = super().get_prep_lookup()
-        return (
-            rhs.replace(":", r"\:")
-            .replace("[", r"\[")
-            .replace("]", r"\]")
-            .replace("(", r"\(")
-            .replace(")", r"\)")
-            .replace("'", r"\'")
-            .replace('"', r"\"")
-            .replace("-", r"\-")
-            .replace("+", r"\+")
-            .replace("*", r"\*")
-            .replace("^", r"\^")
-            .replace("`", r"\`")
-            .replace("{", r"\{")
-            .replace("}", r"\}")
-        )
+        return querystring.escape(querystring.normalize_terms(rhs))
 
 
 @Field.register_lookup
@@ -136,7 +333,7 @@ class PhraseParadeDBLookup(BaseParadeDBLookup):
 
     def process_rhs(self, compiler, connection):
         rhs, rhs_params = super().process_rhs(compiler, connection)
-        return f"'\"{rhs_params[0]}\"'", []
+        return "%s", [f'"{rhs_params[0]}"']
 
 
 @Field.register_lookup
@@ -157,7 +354,34 @@ class PhrasePrefixParadeDBLookup(BaseParadeDBLookup):
 
     def process_rhs(self, compiler, connection):
         rhs, rhs_params = super().process_rhs(compiler, connection)
-        return f"'\"{rhs_params[0]}\"*'", []
+        return "%s", [f'"{rhs_params[0]}"*']
+
+
+@Field.register_lookup
+class ParseSearchLookup(BaseParadeDBLookup):
+    """
+    https://docs.paradedb.com/documentation/advanced/full-text/query-string
+
+    Searches with a query in ParadeDB's query string syntax, validated and
+    single spaced before it reaches the database, see `paradedb.querystring`.
+    Terms without a field search the field of the lookup.
+
+    SELECT description, rating, category
+    FROM mock_items
+    WHERE description @@@ 'keyboard AND (wireless OR category:electronics)';
+    """
+
+    lookup_name = "parse_search"
+
+    def get_prep_lookup(self):
+        rhs = super(BaseParadeDBLookup, self).get_prep_lookup()
+        fields = None
+        col = _col_from_lhs(self.lhs)
+        model = _model_from_lhs(col)
+        index = _bm25_index_for_model(model) if model is not None else None
+        if index is not None:
+            fields = {*index.fields, *index._json_fields, model._meta.pk.name}
+        return querystring.normalize(rhs, lowercase=False, fields=fields)
 
 
 class BaseFuzzyParadeDBLookup(BaseParadeDBLookup):
@@ -183,15 +407,45 @@ class BaseFuzzyParadeDBLookup(BaseParadeDBLookup):
 
         return f'"{tbl}"."{id_field_name}"', []
 
-    def process_rhs(self, compiler, connection):
+    def get_prep_lookup(self):
+        if isinstance(self.rhs, Fuzzy):
+            self.fuzzy = self.rhs
+            self.rhs = self.fuzzy.text
+        else:
+            self.fuzzy = Fuzzy(self.rhs, distance=self.distance)
+        # paradedb.match() takes plain text, not the query string syntax
+        rhs = super(BaseParadeDBLookup, self).get_prep_lookup()
+        return querystring.normalize_terms(rhs)
+
+    def process_rhs(self, compiler, connection, distance=None):
         rhs, rhs_params = super().process_rhs(compiler, connection)
         lhs, _ = super().process_lhs(compiler, connection)
         col = lhs.replace('"', "").rsplit(".", 1)[-1]
-        return (
+        fuzzy = self.fuzzy
+        if distance is None:
+            distance = fuzzy.distance
+        sql = (
             "paradedb.match(field => %s, value => %s, "
             f"conjunction_mode => {self.match_all_terms}, "
-            f"distance => {self.distance})"
-        ), [col, rhs_params[0]]
+            "distance => %s, "
+            f"transposition_cost_one => {str(fuzzy.transposition_cost_one).lower()}, "
+            f"prefix => {str(fuzzy.prefix).lower()})"
+        )
+        return sql, [col, rhs_params[0], distance]
+
+    def as_postgresql(self, compiler, connection):
+        if not self.fuzzy.escalates:
+            return super().as_postgresql(compiler, connection)
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+
+        def search(distance):
+            rhs_sql, rhs_params = self.process_rhs(compiler, connection, distance)
+            return f"{lhs_sql} @@@ {rhs_sql}", [*lhs_params, *rhs_params]
+
+        sql, params = _adaptive_search_sql(
+            self, self.fuzzy, search, compiler, connection
+        )
+        return _with_bm25_condition(self, sql, params, compiler, connection)
 
 
 @Field.register_lookup
@@ -206,3 +460,248 @@ class FuzzyPhraseParadeDBLookup(BaseFuzzyParadeDBLookup):
     lookup_name = "fuzzy_phrase_search"
     match_all_terms = "true"
     distance = 2
+
+
+class JSONSearchPathField(Field):
+    """
+    Output field of `json_term_search`: every following name in the lookup is
+    a key of the JSON document, the lookup value is searched within that key.
+    Names of lookups, e.g. `in` or `contains`, are keys too, only `exact` is a
+    lookup: search a key named "exact" with `json_term_search__exact__exact`.
+    """
+
+    def get_lookup(self, lookup_name):
+        if lookup_name != "exact":
+            return None
+        return super().get_lookup(lookup_name)
+
+    def get_transform(self, name):
+        return JSONSearchKeyFactory(name)
+
+
+class JSONSearchKey(Transform):
+    output_field = JSONSearchPathField()
+
+    def __init__(self, key_name, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key_name = key_name
+
+    def as_sql(self, compiler, connection):
+        raise ValueError(
+            f"The {self.key_name!r} key of json_term_search can only be searched, "
+            "e.g. filter(metadata__json_term_search__author='tolkien')"
+        )
+
+
+class JSONSearchKeyFactory:
+    def __init__(self, key_name):
+        self.key_name = key_name
+
+    def __call__(self, *args, **kwargs):
+        return JSONSearchKey(self.key_name, *args, **kwargs)
+
+
+@JSONField.register_lookup
+class JSONTermSearchTransform(Transform):
+    lookup_name = "json_term_search"
+    output_field = JSONSearchPathField()
+
+
+@JSONSearchPathField.register_lookup
+class JSONTermSearchLookup(PartialIndexMixin, Lookup):
+    """
+    https://docs.paradedb.com/documentation/indexing/create_index#json-fields
+
+    Book.objects.filter(metadata__json_term_search__author="tolkien")
+
+    SELECT * FROM book
+    WHERE id @@@ paradedb.match(field => 'metadata.author', value => 'tolkien');
+    """
+
+    lookup_name = "exact"
+
+    def as_sql(self, compiler, connection):
+        keys = []
+        lhs = self.lhs
+        while isinstance(lhs, (JSONSearchKey, JSONTermSearchTransform)):
+            if isinstance(lhs, JSONSearchKey):
+                keys.insert(0, lhs.key_name)
+            lhs = lhs.lhs
+
+        key_sql = _key_field_sql(lhs, compiler, connection)
+        text = getattr(self.rhs, "value", self.rhs)
+        path = ".".join([_db_col_from_lhs(lhs), *keys])
+
+        sql = f"{key_sql} @@@ paradedb.match(field => %s, value => %s)"
+        return sql, (path, text)
+
+
+def _range_type_for_field(field):
+    return {
+        "SmallIntegerField": "int4range",
+        "PositiveSmallIntegerField": "int4range",
+        "IntegerField": "int4range",
+        "PositiveIntegerField": "int4range",
+        "AutoField": "int4range",
+        "BigIntegerField": "int8range",
+        "PositiveBigIntegerField": "int8range",
+        "BigAutoField": "int8range",
+        "DecimalField": "numrange",
+        "FloatField": "numrange",
+        "DateField": "daterange",
+        "DateTimeField": "tstzrange",
+    }.get(field.get_internal_type(), "numrange")
+
+
+def _term_cast_for_field(field, connection):
+    if field.get_internal_type() in ("CharField", "TextField", "URLField", "SlugField"):
+        return "text"
+    return field.cast_db_type(connection)
+
+
+class BaseBM25FilterLookup(PartialIndexMixin, Lookup):
+    """
+    Filters evaluated by the BM25 index on one of its fast fields instead of
+    on the heap: the predicate is written against the key field, so ParadeDB
+    merges it with the other `@@@` predicates of the query into one index scan.
+    """
+
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        col = _col_from_lhs(self.lhs)
+        model, name = _model_from_lhs(col), col.target.name
+        index = _bm25_index_for_model(model, name) if model is not None else None
+        if index is None or not (
+            index.has_field(name) or name == (index._key_field or model._meta.pk.name)
+        ):
+            raise ValueError(
+                f"{self.lookup_name} needs a field of a BM25Index, "
+                f"{col.target.model.__name__}.{name} isn't indexed"
+            )
+        key_sql = _key_field_sql(col, compiler, connection)
+        query_sql, query_params = self.get_query(col.target, connection)
+        return f"{key_sql} @@@ {query_sql}", (col.target.column, *query_params)
+
+
+@Field.register_lookup
+class BM25TermLookup(BaseBM25FilterLookup):
+    """
+    https://docs.paradedb.com/documentation/advanced/term/term
+
+    Book.objects.filter(publication_year__bm25_term=2000)
+
+    SELECT * FROM book
+    WHERE id @@@ paradedb.term(field => 'publication_year', value => 2000);
+    """
+
+    lookup_name = "bm25_term"
+
+    def get_query(self, field, connection):
+        value = field.get_db_prep_value(self.rhs, connection)
+        cast = _term_cast_for_field(field, connection)
+        return f"paradedb.term(field => %s, value => %s::{cast})", (value,)
+
+
+@Field.register_lookup
+class BM25RangeLookup(BaseBM25FilterLookup):
+    """
+    https://docs.paradedb.com/documentation/advanced/term/range
+
+    Both bounds are inclusive, None leaves the range unbounded on that side:
+
+    Book.objects.filter(publication_year__bm25_range=(2000, None))
+
+    SELECT * FROM book
+    WHERE id @@@ paradedb.range(
+        field => 'publication_year', range => int4range(2000, NULL, '[]')
+    );
+    """
+
+    lookup_name = "bm25_range"
+
+    def get_query(self, field, connection):
+        lower, upper = self.rhs
+        lower, upper = (
+            None if bound is None else field.get_db_prep_value(bound, connection)
+            for bound in (lower, upper)
+        )
+        range_type = _range_type_for_field(field)
+        return (
+            f"paradedb.range(field => %s, range => {range_type}(%s, %s, '[]'))",
+            (lower, upper),
+        )
+
+
+def _term_set_values(field, values, connection):
+    # like IN, NULL never matches and duplicates don't count
+    values = list(dict.fromkeys(v for v in values if v is not None))
+    if not values:
+        raise EmptyResultSet
+    return [field.get_db_prep_value(value, connection) for value in values]
+
+
+def _term_set_sql(field, connection):
+    cast = _term_cast_for_field(field, connection)
+    return (
+        "paradedb.term_set(terms => ARRAY("
+        "SELECT paradedb.term(field => %s, value => v) "
+        f"FROM unnest(%s::{cast}[]) AS v))"
+    )
+
+
+@Field.register_lookup
+class TermSetLookup(BaseBM25FilterLookup):
+    """
+    https://docs.paradedb.com/documentation/advanced/term/term_set
+
+    Matches the rows whose field has one of the values, inside the index. The
+    values are sent as a single array, however many there are:
+
+    Book.objects.filter(publication_year__term_set=[1999, 2000, 2001])
+
+    SELECT * FROM book
+    WHERE id @@@ paradedb.term_set(terms => ARRAY(
+        SELECT paradedb.term(field => 'publication_year', value => v)
+        FROM unnest(ARRAY[1999, 2000, 2001]::integer[]) AS v
+    ));
+
+    Text fields are tokenized, their values match single terms.
+    """
+
+    lookup_name = "term_set"
+
+    def get_query(self, field, connection):
+        values = _term_set_values(field, self.rhs, connection)
+        return _term_set_sql(field, connection), (values,)
+
+
+def term_set_filters(where):
+    """
+    Replaces, in place, the `__in` filters on non-text fields of a BM25Index
+    AND-ed at the top of a WHERE clause by `term_set` lookups. Filters under
+    OR or NOT keep their IN list, as a term set there would change which
+    rows match.
+    """
+    if where.negated or (where.connector != "AND" and len(where.children) > 1):
+        return
+    for i, child in enumerate(where.children):
+        if isinstance(child, WhereNode):
+            term_set_filters(child)
+        elif type(child) is In and _term_set_applies(child):
+            where.children[i] = TermSetLookup(child.lhs, child.rhs)
+
+
+def _term_set_applies(lookup):
+    if not lookup.rhs_is_direct_value() or not hasattr(lookup.lhs, "alias"):
+        return False
+    field = lookup.lhs.target
+    if field.get_internal_type() in ("CharField", "TextField", "URLField", "SlugField"):
+        # tokenized by the index, a term wouldn't match the whole value
+        return False
+    model = field.model
+    index = _bm25_index_for_model(model, field.name)
+    return index is not None and (
+        index.has_field(field.name)
+        or field.name == (index._key_field or model._meta.pk.name)
+    )
@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from ...warmup import load_queries, prewarm, replay
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the BM25 indexes of the installed models and their tables into "
+        "the buffer cache, then optionally replays recorded searches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--queries", type=str, help="JSON lines file of searches to replay"
+        )
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--mode", choices=("buffer", "read", "prefetch"), default="buffer"
+        )
+        parser.add_argument(
+            "--no-heap",
+            action="store_true",
+            default=False,
+            help="Only prewarm the indexes, not the tables",
+        )
+
+    def handle(self, **options):
+        using = options["database"]
+
+        t = time.perf_counter()
+        try:
+            blocks = prewarm(
+                using=using, heap=not options["no_heap"], mode=options["mode"]
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+        for relation, count in blocks.items():
+            self.stdout.write(f"{relation}: {count} blocks", self.style.SQL_TABLE)
+        self.stdout.write(
+            f"Prewarmed {len(blocks)} relations in {time.perf_counter() - t:.2f}s"
+        )
+
+        if options["queries"]:
+            with open(options["queries"]) as f:
+                queries = load_queries(f)
+            t = time.perf_counter()
+            failures = replay(queries, using=using, concurrency=options["concurrency"])
+            self.stdout.write(
+                f"Replayed {len(queries)} searches in {time.perf_counter() - t:.2f}s"
+            )
+            for query, exception in failures:
+                self.stderr.write(f"{json.dumps(query)}: {exception!r}")
+            if failures:
+                raise CommandError(f"{len(failures)} searches failed")
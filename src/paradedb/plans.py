@@ -0,0 +1,126 @@
+"""
+Graceful degradation of searches under a latency budget.
+
+A `SearchPlan` runs a chain of increasingly cheaper querysets, each one under
+its own statement_timeout, until one of them returns within the budget, and
+falls back to the last results served from the cache when none does:
+
+    from paradedb.plans import SearchPlan
+
+    qs = Book.objects.filter(description__fuzzy_phrase_search=text)
+    plan = SearchPlan(
+        [
+            ("full", qs.annotate(score=Score(), hl=Highlight("description"))
+                .order_by("-score")[:20]),
+            ("no_highlight", qs.annotate(score=Score()).order_by("-score")[:20]),
+            ("term", Book.objects.filter(description__term_search=text)[:20]),
+        ],
+        budget_ms=300,
+        cache_key=f"books:{text}",
+    )
+    result = plan.execute()
+    result.rows, result.step  # "full", "no_highlight", "term" or "cache"
+
+Every execution sends the `search_plan_served` signal with the step which
+served it, and its duration, for metrics.
+"""
+
+import time
+
+from django.core.cache import caches
+from django.db import OperationalError
+from django.dispatch import Signal
+
+
+# sent with plan, step, elapsed_ms
+search_plan_served = Signal()
+
+QUERY_CANCELED = "57014"
+
+
+def _is_timeout(exc):
+    return getattr(exc.__cause__, "pgcode", None) == QUERY_CANCELED
+
+
+class SearchPlanResult:
+    def __init__(self, rows, step, elapsed_ms):
+        self.rows = rows
+        self.step = step
+        self.elapsed_ms = elapsed_ms
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class SearchPlan:
+    """
+    `steps` is a list of `(name, queryset)`, from the most to the least
+    expensive, the querysets must use the `ParadeDBManager`. Every step gets
+    the remaining budget, or `step_timeout_ms` if it's lower.
+
+    With `cache_key`, the rows of every successful step are cached for
+    `cache_timeout` seconds, and served as the "cache" step when every step
+    timed out. Without cached rows, the last timeout error is raised.
+    """
+
+    def __init__(
+        self,
+        steps,
+        budget_ms,
+        step_timeout_ms=None,
+        cache_key=None,
+        cache_alias="default",
+        cache_timeout=300,
+    ):
+        if not steps:
+            raise ValueError("A SearchPlan needs at least one step")
+        self.steps = list(steps)
+        self.budget_ms = budget_ms
+        self.step_timeout_ms = step_timeout_ms
+        self.cache_key = cache_key
+        self.cache_alias = cache_alias
+        self.cache_timeout = cache_timeout
+
+    def _served(self, rows, step, start):
+        elapsed_ms = (time.monotonic() - start) * 1000
+        search_plan_served.send(
+            sender=self.__class__, plan=self, step=step, elapsed_ms=elapsed_ms
+        )
+        return SearchPlanResult(rows, step, elapsed_ms)
+
+    def execute(self):
+        start = time.monotonic()
+        error = None
+        for name, queryset in self.steps:
+            remaining_ms = self.budget_ms - (time.monotonic() - start) * 1000
+            if remaining_ms < 1:
+                break
+            timeout_ms = remaining_ms
+            if self.step_timeout_ms is not None:
+                timeout_ms = min(timeout_ms, self.step_timeout_ms)
+            try:
+                rows = list(
+                    queryset.search_options(statement_timeout_ms=int(timeout_ms))
+                )
+            except OperationalError as exc:
+                if not _is_timeout(exc):
+                    raise
+                error = exc
+                continue
+
+            if self.cache_key is not None:
+                caches[self.cache_alias].set(self.cache_key, rows, self.cache_timeout)
+            return self._served(rows, name, start)
+
+        if self.cache_key is not None:
+            rows = caches[self.cache_alias].get(self.cache_key)
+            if rows is not None:
+                return self._served(rows, "cache", start)
+        if error is None:
+            raise OperationalError(
+                f"Search budget of {self.budget_ms}ms exhausted before any step ran"
+            )
+        raise error
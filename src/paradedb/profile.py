@@ -0,0 +1,194 @@
+"""
+Per-request profiling of the ParadeDB queries, to catch N+1 searches.
+
+A template running a search per row, or a `Highlight` annotated in a loop,
+turns one page into hundreds of BM25 queries of the same shape. `capture()`
+records the ParadeDB queries run in a block, grouped by their shape (the SQL
+with the values left out), with their count, total time and the line of
+Python code which ran them:
+
+    from paradedb import profile
+
+    with profile.capture(max_repeats=5, action="raise") as searches:
+        response = client.get("/books/?q=dragons")
+    print(searches.report())
+
+With `max_repeats`, a shape run more often than that warns with a
+`RepeatedSearchWarning`, or raises `RepeatedSearchError` with
+`action="raise"`.
+
+`SearchProfileMiddleware` does the same for every request when DEBUG is on,
+logging the report to the "paradedb.profile" logger:
+
+    MIDDLEWARE = [..., "paradedb.profile.SearchProfileMiddleware"]
+    PARADEDB_PROFILE_MAX_REPEATS = 10  # None to only log
+    PARADEDB_PROFILE_RAISE = False  # True to raise instead of warning
+"""
+
+import logging
+import os
+import re
+import time
+import traceback
+import warnings
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger("paradedb.profile")
+
+# the stand-in backend calls paradedb_match() and the like
+_SEARCH = re.compile(r"@@@|&&&|\bparadedb\.|\bpdb\.|\bparadedb_\w+\(")
+
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # quoted literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # numbers, e.g. LIMIT 10
+    (re.compile(r"%s(?:\s*,\s*%s)+"), "%s, ..."),  # IN lists of any length
+    (re.compile(r"\s+"), " "),
+)
+
+# frames of these directories are skipped when looking for the call site
+_INTERNAL = tuple(
+    os.path.dirname(path) + os.sep for path in (django.__file__, __file__, os.__file__)
+)
+
+
+class RepeatedSearchWarning(UserWarning):
+    pass
+
+
+class RepeatedSearchError(AssertionError):
+    pass
+
+
+def is_search(sql):
+    return bool(_SEARCH.search(sql))
+
+
+def normalize(sql):
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def _call_site():
+    for frame in reversed(traceback.extract_stack()):
+        if not frame.filename.startswith(_INTERNAL):
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class QueryShape:
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.call_sites = Counter()
+
+    def __repr__(self):
+        return f"<QueryShape x{self.count} {self.total_ms:.1f}ms: {self.sql[:60]}>"
+
+
+class SearchProfile:
+    def __init__(self):
+        self.shapes = {}
+
+    def record(self, sql, elapsed_ms, call_site):
+        shape = normalize(sql)
+        if shape not in self.shapes:
+            self.shapes[shape] = QueryShape(shape)
+        shape = self.shapes[shape]
+        shape.count += 1
+        shape.total_ms += elapsed_ms
+        shape.call_sites[call_site] += 1
+
+    @property
+    def count(self):
+        return sum(shape.count for shape in self.shapes.values())
+
+    @property
+    def total_ms(self):
+        return sum(shape.total_ms for shape in self.shapes.values())
+
+    def repeated(self, max_repeats):
+        """
+        The shapes run more than `max_repeats` times, the most frequent first.
+        """
+        return sorted(
+            (shape for shape in self.shapes.values() if shape.count > max_repeats),
+            key=lambda shape: -shape.count,
+        )
+
+    def report(self):
+        lines = [f"{self.count} ParadeDB queries in {self.total_ms:.1f}ms"]
+        for shape in sorted(self.shapes.values(), key=lambda s: -s.total_ms):
+            lines.append(f"{shape.count:>5}x {shape.total_ms:>9.1f}ms  {shape.sql}")
+            for call_site, count in shape.call_sites.most_common(3):
+                lines.append(f"{'':>18}{count}x {call_site}")
+        return "\n".join(lines)
+
+    def check(self, max_repeats, action="warn"):
+        repeated = self.repeated(max_repeats)
+        if not repeated:
+            return
+        message = "\n".join(
+            f"ParadeDB query run {shape.count} times (max {max_repeats}), "
+            f"from {shape.call_sites.most_common(1)[0][0]}: {shape.sql}"
+            for shape in repeated
+        )
+        if action == "raise":
+            raise RepeatedSearchError(message)
+        warnings.warn(message, RepeatedSearchWarning, stacklevel=3)
+
+
+@contextmanager
+def capture(max_repeats=None, action="warn", using=None):
+    """
+    Records the ParadeDB queries run in the block on the `using` database
+    aliases (all of them by default), in the current thread, and yields the
+    SearchProfile. `action` is "warn" or "raise", see the module documentation.
+    """
+    if action not in ("warn", "raise"):
+        raise ValueError(f"action must be 'warn' or 'raise', not {action!r}")
+    profile = SearchProfile()
+
+    def wrapper(execute, sql, params, many, context):
+        if not is_search(sql):
+            return execute(sql, params, many, context)
+        t = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - t) * 1000
+            profile.record(sql, elapsed_ms, _call_site())
+
+    with ExitStack() as stack:
+        for alias in [using] if isinstance(using, str) else using or connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield profile
+    if max_repeats is not None:
+        profile.check(max_repeats, action)
+
+
+class SearchProfileMiddleware:
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture() as profile:
+            response = self.get_response(request)
+        if profile.count:
+            logger.debug("%s %s\n%s", request.method, request.path, profile.report())
+
+        max_repeats = getattr(settings, "PARADEDB_PROFILE_MAX_REPEATS", 10)
+        if max_repeats is not None:
+            raise_ = getattr(settings, "PARADEDB_PROFILE_RAISE", False)
+            profile.check(max_repeats, "raise" if raise_ else "warn")
+        return response
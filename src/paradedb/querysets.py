@@ -0,0 +1,477 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connections, models, router, transaction
+from django.db.models import F, OrderBy, Window
+from django.db.models.functions import RowNumber
+
+from .functions import Highlight, MoreLikeThis, Score
+from .lookups import PartialIndexMixin, _bm25_index_for_model, term_set_filters
+
+
+# search_options() names: Postgres settings
+SEARCH_OPTIONS = {
+    "parallel_workers": "max_parallel_workers_per_gather",
+    "statement_timeout_ms": "statement_timeout",
+    "lock_timeout_ms": "lock_timeout",
+    "work_mem": "work_mem",
+}
+
+
+def _ordering_name(expression):
+    # the field ordered by, for from_index() and search_order_by() to check it
+    if isinstance(expression, str):
+        return expression.lstrip("-")
+    if isinstance(expression, OrderBy):
+        expression = expression.expression
+    if isinstance(expression, F):
+        return expression.name
+    raise ValueError(
+        f"Can't tell if {expression!r} is a fast field, order by the name or F() "
+        "of a fast field"
+    )
+
+
+def is_search_query(query):
+    """
+    True if the query uses a ParadeDB lookup or function.
+    """
+    nodes = [query.where, *query.annotations.values()]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (PartialIndexMixin, MoreLikeThis, Score, Highlight)):
+            return True
+        if hasattr(node, "children"):
+            nodes.extend(node.children)
+        elif hasattr(node, "get_source_expressions"):
+            nodes.extend(e for e in node.get_source_expressions() if e is not None)
+    return False
+
+
+class _HitBatch:
+    # the model instances of a batch of hits, loaded together on first use
+    __slots__ = ("model", "pks", "using", "instances")
+
+    def __init__(self, model, pks, using):
+        self.model = model
+        self.pks = pks
+        self.using = using
+        self.instances = None
+
+    def instance(self, pk):
+        if self.instances is None:
+            self.instances = self.model._default_manager.using(self.using).in_bulk(
+                self.pks
+            )
+        return self.instances[pk]
+
+
+class Hit:
+    """
+    A search result holding the primary key, the score, the highlight and the
+    fields selected by `ParadeDBQuerySet.hits()`. Other attributes are read
+    from the model instance, loaded for all the hits of the batch at once.
+    """
+
+    __slots__ = ("pk", "score", "highlight", "_values", "_batch")
+
+    def __init__(self, pk, score, highlight, values, batch):
+        self.pk = pk
+        self.score = score
+        self.highlight = highlight
+        self._values = values
+        self._batch = batch
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            return getattr(self.instance, name)
+
+    @property
+    def instance(self):
+        return self._batch.instance(self.pk)
+
+    def __repr__(self):
+        return f"<Hit: {self._batch.model.__name__} {self.pk} ({self.score})>"
+
+
+class ParadeDBQuerySet(models.QuerySet):
+    """
+    QuerySet with search specific helpers, use it with
+    `objects = ParadeDBManager()` on models having a BM25Index.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.search_order_pushdown = False
+        self._search_options = {}
+        self._search_db = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.search_order_pushdown = self.search_order_pushdown
+        clone._search_options = self._search_options
+        clone._search_db = self._search_db
+        return clone
+
+    def search_options(self, **options):
+        """
+        Runs the queries of this queryset with the given Postgres settings,
+        applied with SET LOCAL in a transaction (or a savepoint within an
+        existing one) around each query, then restored:
+
+        Book.objects.filter(description__term_search="dragons").search_options(
+            parallel_workers=4, statement_timeout_ms=200, work_mem="64MB"
+        )
+
+        Options: parallel_workers (max_parallel_workers_per_gather),
+        statement_timeout_ms, lock_timeout_ms and work_mem.
+        """
+        unknown = set(options) - set(SEARCH_OPTIONS)
+        if unknown:
+            raise TypeError(f"Unknown search options: {', '.join(sorted(unknown))}")
+        clone = self._chain()
+        clone._search_options = {**self._search_options, **options}
+        return clone
+
+    @contextmanager
+    def _applied_search_options(self, using):
+        if not self._search_options:
+            yield
+            return
+        settings = [
+            (SEARCH_OPTIONS[name], str(value))
+            for name, value in self._search_options.items()
+        ]
+        set_sql = "SELECT %s" % ", ".join(["set_config(%s, %s, true)"] * len(settings))
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                # SET LOCAL lasts until the end of the outermost transaction,
+                # keep the previous values to restore them after the query
+                cursor.execute(
+                    "SELECT %s" % ", ".join(["current_setting(%s)"] * len(settings)),
+                    [name for name, _ in settings],
+                )
+                previous = list(
+                    zip([name for name, _ in settings], cursor.fetchone(), strict=True)
+                )
+                cursor.execute(set_sql, [p for setting in settings for p in setting])
+            # on errors, rolling back the savepoint reverts the settings
+            yield
+            with connections[using].cursor() as cursor:
+                cursor.execute(set_sql, [p for setting in previous for p in setting])
+
+    def _with_search_options(self, method, *args, **kwargs):
+        # the settings only apply to one connection: resolve the database
+        # once, and run the query on it
+        using = self.db
+        qs = self.using(using)
+        with self._applied_search_options(using):
+            return getattr(super(ParadeDBQuerySet, qs), method)(*args, **kwargs)
+
+    def _fetch_all(self):
+        if self._result_cache is not None or not self._search_options:
+            return super()._fetch_all()
+        using = self.db
+        qs = self.using(using)
+        with self._applied_search_options(using):
+            super(ParadeDBQuerySet, qs)._fetch_all()
+        self._result_cache = qs._result_cache
+        self._prefetch_done = qs._prefetch_done
+
+    def count(self):
+        if self._result_cache is not None or not self._search_options:
+            return super().count()
+        return self._with_search_options("count")
+
+    def exists(self):
+        if self._result_cache is not None or not self._search_options:
+            return super().exists()
+        return self._with_search_options("exists")
+
+    def aggregate(self, *args, **kwargs):
+        if not self._search_options:
+            return super().aggregate(*args, **kwargs)
+        return self._with_search_options("aggregate", *args, **kwargs)
+
+    def iterator(self, chunk_size=None):
+        if not self._search_options:
+            return super().iterator(chunk_size=chunk_size)
+        using = self.db
+        qs = self.using(using)
+        iterator = super(ParadeDBQuerySet, qs).iterator(chunk_size=chunk_size)
+        return self._iterator_with_search_options(using, iterator)
+
+    def _iterator_with_search_options(self, using, iterator):
+        # the transaction stays open until the iterator is exhausted or closed
+        with self._applied_search_options(using):
+            yield from iterator
+
+    @property
+    def db(self):
+        # Let routers send searches elsewhere, see paradedb.routers.SearchRouter
+        if self._for_write or self._db or not is_search_query(self.query):
+            return super().db
+        if self._search_db is None:
+            # pin the database picked by the routers, every query of the
+            # queryset and of its clones runs on the same replica. Kept apart
+            # from _db so that writes still go through db_for_write.
+            self._search_db = router.db_for_read(self.model, search=True, **self._hints)
+        return self._search_db
+
+    def _is_fast_field(self, name):
+        annotation = self.query.annotations.get(name)
+        if annotation is not None:
+            return isinstance(annotation, Score)
+
+        index = _bm25_index_for_model(self.model, name)
+        if index is None:
+            return False
+        if name in ("pk", self.model._meta.pk.name):
+            return True
+        return index.is_fast_field(self.model, name)
+
+    def _not_fast_fields(self, names):
+        return [name for name in names if "__" in name or not self._is_fast_field(name)]
+
+    def order_by(self, *field_names):
+        clone = super().order_by(*field_names)
+        clone.search_order_pushdown = False
+        return clone
+
+    def search_order_by(self, *field_names):
+        """
+        https://docs.paradedb.com/documentation/full-text/sorting
+
+        Sorts the search results. When every sort key is a fast field of the
+        model's BM25Index, or a Score annotation, ParadeDB can return the top N
+        rows straight from the index, provided the queryset is sliced:
+
+        Book.objects.filter(description__term_search="dragons")
+            .search_order_by("-publication_year")[:10]
+
+        SELECT ... FROM book WHERE description @@@ 'dragons'
+        ORDER BY publication_year DESC LIMIT 10;
+
+        Other keys, spanning relations, on fields that aren't fast, e.g.
+        tokenized text fields, or expressions, are sorted by Postgres like
+        `order_by()` does. `search_order_pushdown` tells whether ParadeDB can
+        sort in the index, until the ordering is changed.
+        """
+        try:
+            names = [_ordering_name(expression) for expression in field_names]
+        except ValueError:
+            names = None
+        clone = self.order_by(*field_names)
+        clone.search_order_pushdown = bool(names) and not self._not_fast_fields(names)
+        return clone
+
+    def from_index(self, *fields):
+        """
+        https://docs.paradedb.com/documentation/indexing/fast_fields
+
+        Dictionaries of the given fast fields of the model's BM25Index, or
+        Score annotations, like `values()`. When every selected column is a
+        fast field and the query filters with ParadeDB lookups only, ParadeDB
+        reads the values from the index and skips the heap fetches:
+
+        Book.objects.filter(description__term_search="dragons")
+            .annotate(score=Score())
+            .from_index("pk", "publication_year", "score")
+
+        Without fields, selects the primary key and the fast fields of the
+        index. Raises ValueError if a field isn't fast, or the queryset is
+        ordered by one, or by an expression. The default ordering of the model
+        is dropped.
+        """
+        if not fields:
+            index = _bm25_index_for_model(self.model)
+            if index is None:
+                raise ValueError(f"{self.model.__name__} has no BM25Index")
+            fields = (
+                "pk",
+                *(name for name in index.fields if self._is_fast_field(name)),
+            )
+        ordering = [_ordering_name(expression) for expression in self.query.order_by]
+        not_fast = self._not_fast_fields([*fields, *ordering])
+        if not_fast:
+            raise ValueError(
+                "Not fast fields of the BM25Index of %s: %s"
+                % (self.model.__name__, ", ".join(not_fast))
+            )
+        clone = self.values(*fields)
+        if not self.query.order_by:
+            clone.query.default_ordering = False
+        return clone
+
+    def term_set_filters(self):
+        """
+        https://docs.paradedb.com/documentation/advanced/term/term_set
+
+        Evaluates the `__in` filters already applied on non-text fields of the
+        model's BM25Index, or on its key field, as `term_set` lookups: the
+        values are sent as one array and matched by the BM25 index scan,
+        rather than parsed one by one and checked on the rows it returns.
+
+        Book.objects.filter(description__term_search="war", pk__in=allowed_ids)
+            .term_set_filters()
+
+        Only the filters AND-ed at the top of the query are rewritten, those
+        under OR or NOT are left as they are.
+        """
+        clone = self._chain()
+        term_set_filters(clone.query.where)
+        return clone
+
+    def collapse(self, field, per_group=1, order_by=None):
+        """
+        Keeps the best `per_group` rows for every value of `field`, e.g. at
+        most two reviews per item, ranked with `order_by` (by default the
+        `score` annotation, added if missing, best first):
+
+        Review.objects.filter(review__term_search="great").collapse("item", 2)
+
+        SELECT * FROM (
+            SELECT ..., ROW_NUMBER() OVER (
+                PARTITION BY item_id ORDER BY pdb.score(id) DESC
+            ) AS collapse_rank
+            FROM review WHERE review @@@ 'great'
+        ) WHERE collapse_rank <= 2
+
+        Unless the queryset is already ordered, the results are sorted with
+        `order_by` too.
+        """
+        qs = self
+        if order_by is None:
+            if "score" not in qs.query.annotations:
+                qs = qs.annotate(score=Score())
+            order_by = ["-score"]
+        elif isinstance(order_by, str):
+            order_by = [order_by]
+        ordering = [
+            F(name[1:]).desc() if name.startswith("-") else F(name).asc()
+            for name in order_by
+        ]
+        qs = qs.annotate(
+            collapse_rank=Window(RowNumber(), partition_by=F(field), order_by=ordering)
+        ).filter(collapse_rank__lte=per_group)
+        if not self.query.order_by:
+            qs = qs.order_by(*order_by)
+        return qs
+
+    def hits(self, *fields, highlight=None, batch_size=100):
+        """
+        Lightweight `Hit` objects rather than model instances, with only the
+        primary key, the `score`, the values of `fields` and, given a field
+        name or a `Highlight`, the `highlight` snippet:
+
+        for hit in Book.objects.filter(description__term_search="dragons")
+            .search_order_by("-score")[:100].hits("title", highlight="description"):
+            hit.title, hit.score, hit.highlight
+
+        The hits are generated lazily, fetched `batch_size` rows at a time.
+        Reading any other attribute loads the model instances of all the hits
+        of the batch with a single query.
+        """
+        qs = self
+        if "score" not in qs.query.annotations:
+            qs = qs.annotate(score=Score())
+        names = ["pk", "score", *fields]
+        if highlight is not None:
+            if not isinstance(highlight, Highlight):
+                highlight = Highlight(highlight)
+            qs = qs.annotate(highlight=highlight)
+            names.append("highlight")
+
+        rows = qs.values_list(*names).iterator(chunk_size=batch_size)
+        return self._iter_hits(rows, fields, highlight is not None, batch_size, qs.db)
+
+    def _iter_hits(self, rows, fields, highlight, batch_size, using):
+        while rows_batch := list(islice(rows, batch_size)):
+            batch = _HitBatch(self.model, [row[0] for row in rows_batch], using)
+            for row in rows_batch:
+                yield Hit(
+                    row[0],
+                    row[1],
+                    row[-1] if highlight else None,
+                    dict(zip(fields, row[2 : 2 + len(fields)], strict=True)),
+                    batch,
+                )
+
+    def _partition_field(self):
+        index = _bm25_index_for_model(self.model)
+        field = index.partition_field if index is not None else None
+        if field is None:
+            raise ValueError(
+                f"The BM25Index of {self.model.__name__} has no partition_field"
+            )
+        return index, field
+
+    def for_partition(self, value):
+        """
+        Restricts the search to the partition holding the rows whose
+        `partition_field` is `value`, e.g. one tenant. Postgres prunes the
+        other partitions when planning, so only that partition's BM25 index
+        is scanned.
+
+        Ticket.objects.for_partition("acme").filter(body__term_search="refund")
+        """
+        index, field = self._partition_field()
+        if index.partition_values() and index.partition_for(value) is None:
+            raise ValueError(f"No partition of {index.name} holds {value!r}")
+        return self.filter(**{field: value})
+
+    def top_k_by_partition(self, k, field=None, values=None):
+        """
+        The `k` best scoring rows across partitions, annotated with their
+        `score`. Every partition returns its own top `k` straight from its
+        BM25 index, the branches are combined with UNION ALL, which Postgres
+        can run as a Parallel Append, and the global top `k` is merged by score:
+
+        Ticket.objects.filter(body__term_search="refund").top_k_by_partition(10)
+
+        `field` and `values` default to the `partition_field` and partitions of
+        the model's BM25Index. Every partition index computes BM25 with its own
+        term statistics, so scores are only comparable between partitions of
+        similar content.
+        """
+        if field is None:
+            index, field = self._partition_field()
+            if values is None:
+                values = list(index.partition_values().values())
+        if not values:
+            raise ValueError("top_k_by_partition() needs partition values")
+
+        qs = self
+        if "score" not in qs.query.annotations:
+            qs = qs.annotate(score=Score())
+        branches = [
+            (
+                qs.filter(**{f"{field}__in": value})
+                if isinstance(value, (list, tuple))
+                else qs.filter(**{field: value})
+            ).search_order_by("-score")[:k]
+            for value in values
+        ]
+        return branches[0].union(*branches[1:], all=True).order_by("-score")[:k]
+
+    def more_like_this(self, document_pk, fields=None, **options):
+        """
+        Rows similar to the one with primary key `document_pk` (excluded from
+        the results), annotated with their `score` and best matches first.
+        See `paradedb.functions.MoreLikeThis` for the options.
+
+        Book.objects.more_like_this(book.pk, fields=["description"])[:10]
+        """
+        return (
+            self.filter(MoreLikeThis(document_pk, fields=fields, **options))
+            .exclude(pk=document_pk)
+            .annotate(score=Score())
+            .search_order_by("-score")
+        )
+
+
+ParadeDBManager = models.Manager.from_queryset(ParadeDBQuerySet)
@@ -0,0 +1,405 @@
+"""
+Parsing, validation and normalization of search input before it is sent to
+ParadeDB.
+
+https://docs.paradedb.com/documentation/advanced/full-text/query-string
+
+`parse()` reads a query written in ParadeDB's query string syntax into a tree
+of nodes in a single pass over the text, and rejects malformed or pathological
+queries (too many terms, too deeply nested) without a database round trip.
+`str()` on the tree gives back a canonical form of the query. `normalize()`
+does both and lowercases the terms, so that equivalent inputs share the same
+cache keys:
+
+>>> normalize('Title:Harry  AND  (potter OR "Half  Blood"~1)^2')
+'Title:harry AND (potter OR "half blood"~1)^2'
+"""
+
+MAX_LENGTH = 4096
+MAX_TERMS = 128
+MAX_DEPTH = 8
+
+OPERATORS = ("AND", "OR", "NOT")
+
+# Characters escaped by the term_search family of lookups
+_LOOKUP_ESCAPES = str.maketrans({c: "\\" + c for c in ":[]()'\"-+*^`{}"})
+
+# Characters ending a term, unless escaped with a backslash
+_TERM_DELIMITERS = frozenset('()[]{}"^~:*')
+
+# Characters escaped when writing a term back
+_TERM_ESCAPES = str.maketrans({c: "\\" + c for c in "\\()[]{}\"^~:*+-'` "})
+
+
+class QueryStringError(ValueError):
+    pass
+
+
+def escape(text):
+    """
+    Escapes the query string syntax in `text`, so that it is searched as
+    plain terms.
+    """
+    return text.translate(_LOOKUP_ESCAPES)
+
+
+def normalize_terms(text, max_terms=MAX_TERMS):
+    """
+    Plain search terms, single spaced. The case is kept: fields indexed with
+    the raw or keyword tokenizers match it exactly. Raises QueryStringError
+    for texts longer than MAX_LENGTH or with more than `max_terms` terms.
+    """
+    if len(text) > MAX_LENGTH:
+        raise QueryStringError(
+            f"Search query too long ({len(text)} characters, max {MAX_LENGTH})"
+        )
+    terms = text.split()
+    if len(terms) > max_terms:
+        raise QueryStringError(f"Too many search terms (max {max_terms})")
+    return " ".join(terms)
+
+
+class Term:
+    def __init__(self, text, prefix=False, distance=None):
+        self.text = text
+        self.prefix = prefix
+        self.distance = distance
+
+    def __str__(self):
+        out = self.text.translate(_TERM_ESCAPES)
+        if self.prefix:
+            out += "*"
+        if self.distance is not None:
+            out += f"~{self.distance}"
+        return out
+
+    def lower(self):
+        return Term(self.text.lower(), self.prefix, self.distance)
+
+
+class Phrase:
+    def __init__(self, text, slop=None, prefix=False):
+        self.text = text
+        self.slop = slop
+        self.prefix = prefix
+
+    def __str__(self):
+        out = '"%s"' % self.text.replace("\\", "\\\\").replace('"', '\\"')
+        if self.slop is not None:
+            out += f"~{self.slop}"
+        if self.prefix:
+            out += "*"
+        return out
+
+    def lower(self):
+        return Phrase(self.text.lower(), self.slop, self.prefix)
+
+
+class Range:
+    def __init__(self, lower, upper, include_lower=True, include_upper=True):
+        self.lower_bound = lower
+        self.upper_bound = upper
+        self.include_lower = include_lower
+        self.include_upper = include_upper
+
+    def __str__(self):
+        lower, upper = (
+            "*" if bound is None else bound.translate(_TERM_ESCAPES)
+            for bound in (self.lower_bound, self.upper_bound)
+        )
+        return "%s%s TO %s%s" % (
+            "[" if self.include_lower else "{",
+            lower,
+            upper,
+            "]" if self.include_upper else "}",
+        )
+
+    def lower(self):
+        return self
+
+
+class Clause:
+    """
+    A term, phrase, range or group, with its field, `+`/`-` occurrence and
+    boost.
+    """
+
+    def __init__(self, node, field=None, occur="", boost=None):
+        self.node = node
+        self.field = field
+        self.occur = occur
+        self.boost = boost
+
+    def __str__(self):
+        out = self.occur
+        if self.field:
+            out += f"{self.field}:"
+        out += str(self.node)
+        if self.boost is not None:
+            out += f"^{self.boost:g}"
+        return out
+
+    def lower(self):
+        return Clause(self.node.lower(), self.field, self.occur, self.boost)
+
+
+class Group:
+    """
+    A sequence of clauses and operators, `root` for the whole query, which
+    isn't written between parentheses.
+    """
+
+    def __init__(self, items, root=False):
+        self.items = items
+        self.root = root
+
+    def __str__(self):
+        out = " ".join(str(item) for item in self.items)
+        return out if self.root else f"({out})"
+
+    def __iter__(self):
+        # every clause of the query, depth first
+        for item in self.items:
+            if isinstance(item, Clause):
+                yield item
+                if isinstance(item.node, Group):
+                    yield from item.node
+
+    def lower(self):
+        return Group(
+            [item if isinstance(item, str) else item.lower() for item in self.items],
+            self.root,
+        )
+
+
+class _Parser:
+    def __init__(self, text, fields, max_terms, max_depth):
+        self.text = text
+        self.pos = 0
+        self.fields = fields
+        self.max_terms = max_terms
+        self.max_depth = max_depth
+        self.terms = 0
+
+    def error(self, message):
+        return QueryStringError(f"{message} at position {self.pos}")
+
+    def peek(self):
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def skip_whitespace(self):
+        while self.peek().isspace():
+            self.pos += 1
+
+    def count_terms(self, count=1):
+        self.terms += count
+        if self.terms > self.max_terms:
+            raise self.error(f"Too many search terms (max {self.max_terms})")
+
+    def parse(self):
+        return self.group(depth=0)
+
+    def group(self, depth):
+        if depth > self.max_depth:
+            raise self.error(f"Query nested too deeply (max {self.max_depth})")
+        items = []
+        while True:
+            self.skip_whitespace()
+            char = self.peek()
+            if not char:
+                if depth:
+                    raise self.error("Missing closing parenthesis")
+                break
+            if char == ")":
+                if not depth:
+                    raise self.error("Unbalanced closing parenthesis")
+                self.pos += 1
+                break
+
+            word = self.operator()
+            if word:
+                previous = items[-1] if items else None
+                if word != "NOT" and not isinstance(previous, Clause):
+                    raise self.error(f"{word} without a left operand")
+                if word == "NOT" and previous == "NOT":
+                    raise self.error("Repeated NOT")
+                items.append(word)
+            else:
+                items.append(self.clause(depth))
+
+        if not items:
+            raise self.error("Empty query" if not depth else "Empty group")
+        if isinstance(items[-1], str):
+            raise self.error(f"{items[-1]} without a right operand")
+        return Group(items, root=not depth)
+
+    def operator(self):
+        for word in OPERATORS:
+            end = self.pos + len(word)
+            if self.text.startswith(word, self.pos) and (
+                end == len(self.text)
+                or self.text[end].isspace()
+                or self.text[end] == "("
+            ):
+                self.pos = end
+                return word
+        return None
+
+    def clause(self, depth):
+        occur = ""
+        if self.peek() in ("+", "-"):
+            occur = self.peek()
+            self.pos += 1
+
+        field = self.field()
+        char = self.peek()
+        if char == "(":
+            self.pos += 1
+            node = self.group(depth + 1)
+        elif char == '"':
+            node = self.phrase()
+        elif char in ("[", "{"):
+            node = self.range()
+        else:
+            node = self.term()
+
+        boost = None
+        if self.peek() == "^":
+            self.pos += 1
+            boost = self.number(float, "boost")
+        return Clause(node, field, occur, boost)
+
+    def field(self):
+        # `name:` in front of a clause, names may contain dots for JSON keys
+        end = self.pos
+        while end < len(self.text) and (
+            self.text[end].isalnum() or self.text[end] in "_."
+        ):
+            end += 1
+        if end == self.pos or end >= len(self.text) or self.text[end] != ":":
+            return None
+
+        name = self.text[self.pos : end]
+        if self.fields is not None and name.split(".")[0] not in self.fields:
+            raise self.error(f"Unknown field {name!r}")
+        self.pos = end + 1
+        return name
+
+    def number(self, kind, name):
+        start = self.pos
+        while self.peek().isdigit() or self.peek() == ".":
+            self.pos += 1
+        try:
+            return kind(self.text[start : self.pos])
+        except ValueError:
+            raise self.error(f"Invalid {name}") from None
+
+    def word(self):
+        chars = []
+        while True:
+            char = self.peek()
+            if not char or char.isspace() or char in _TERM_DELIMITERS:
+                break
+            if char == "\\":
+                self.pos += 1
+                char = self.peek()
+                if not char:
+                    raise self.error("Dangling escape character")
+            chars.append(char)
+            self.pos += 1
+        return "".join(chars)
+
+    def term(self):
+        text = self.word()
+        if not text:
+            raise self.error(f"Unexpected {self.peek()!r}")
+        self.count_terms()
+
+        prefix, distance = False, None
+        if self.peek() == "*":
+            self.pos += 1
+            prefix = True
+        if self.peek() == "~":
+            self.pos += 1
+            distance = self.number(int, "fuzzy distance") if self.peek() else 1
+        return Term(text, prefix, distance)
+
+    def phrase(self):
+        self.pos += 1
+        chars = []
+        while True:
+            char = self.peek()
+            if not char:
+                raise self.error("Unterminated phrase")
+            self.pos += 1
+            if char == '"':
+                break
+            if char == "\\":
+                char = self.peek()
+                self.pos += 1
+            chars.append(char)
+
+        text = " ".join("".join(chars).split())
+        if not text:
+            raise self.error("Empty phrase")
+        self.count_terms(len(text.split()))
+
+        slop, prefix = None, False
+        if self.peek() == "~":
+            self.pos += 1
+            slop = self.number(int, "slop")
+        if self.peek() == "*":
+            self.pos += 1
+            prefix = True
+        return Phrase(text, slop, prefix)
+
+    def range(self):
+        include_lower = self.peek() == "["
+        self.pos += 1
+        self.skip_whitespace()
+        lower = self.bound()
+        self.skip_whitespace()
+        if not self.text.startswith("TO", self.pos):
+            raise self.error("Expected TO in range")
+        self.pos += 2
+        self.skip_whitespace()
+        upper = self.bound()
+        self.skip_whitespace()
+        if self.peek() not in ("]", "}"):
+            raise self.error("Unterminated range")
+        include_upper = self.peek() == "]"
+        self.pos += 1
+        self.count_terms()
+        return Range(lower, upper, include_lower, include_upper)
+
+    def bound(self):
+        if self.peek() == "*":
+            self.pos += 1
+            return None
+        value = self.word()
+        if not value:
+            raise self.error("Missing range bound")
+        return value
+
+
+def parse(text, fields=None, max_terms=MAX_TERMS, max_depth=MAX_DEPTH):
+    """
+    Parses a query string into a `Group` of clauses, raises QueryStringError
+    if it is malformed, too large or, when `fields` is given, uses a field
+    which isn't in it.
+    """
+    if len(text) > MAX_LENGTH:
+        raise QueryStringError(
+            f"Search query too long ({len(text)} characters, max {MAX_LENGTH})"
+        )
+    return _Parser(text, fields, max_terms, max_depth).parse()
+
+
+def normalize(text, lowercase=True, **kwargs):
+    """
+    Canonical form of a query string, see `parse()` for the arguments.
+    """
+    query = parse(text, **kwargs)
+    if lowercase:
+        query = query.lower()
+    return str(query)
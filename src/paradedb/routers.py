@@ -0,0 +1,126 @@
+"""
+Database router sending searches to read replicas.
+
+    DATABASE_ROUTERS = ["paradedb.routers.SearchRouter"]
+    PARADEDB_SEARCH_REPLICAS = ["replica1", "replica2"]
+
+Querysets of models using the `ParadeDBManager` which filter with a ParadeDB
+lookup, or annotate a `Score` or `Highlight`, are read from one of the
+replicas picked at random, once per queryset: its queries, and those of its
+clones, all run on the same replica. Replicas whose replay lag exceeds
+`PARADEDB_MAX_REPLICATION_LAG` seconds (default: 10, None to disable the
+check) are skipped until they catch up; with no replica left, searches go to
+the primary database. Everything else is left to the other routers.
+
+Use `use_primary()` to read your own writes:
+
+    with use_primary():
+        book.save()
+        Book.objects.filter(title__term_search=book.title)
+"""
+
+import contextvars
+import random
+import time
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+_use_primary = contextvars.ContextVar("paradedb_use_primary", default=False)
+
+# How long the measured lag of a replica is trusted, in seconds
+LAG_CHECK_INTERVAL = 5
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+"""
+
+
+class use_primary(ContextDecorator):
+    """
+    Sends the searches made within the block, or the decorated function, to
+    the primary database.
+    """
+
+    def __enter__(self):
+        self._token = _use_primary.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _use_primary.reset(self._token)
+        return False
+
+
+class SearchRouter:
+    def __init__(self):
+        self._lags = {}
+
+    @property
+    def replicas(self):
+        return list(getattr(settings, "PARADEDB_SEARCH_REPLICAS", []))
+
+    @property
+    def primary(self):
+        return getattr(settings, "PARADEDB_PRIMARY_DATABASE", "default")
+
+    @property
+    def max_lag(self):
+        return getattr(settings, "PARADEDB_MAX_REPLICATION_LAG", 10)
+
+    def replication_lag(self, alias):
+        """
+        Replay lag of the replica in seconds, None if it can't be measured.
+        """
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            return None
+
+    def _lag(self, alias):
+        now = time.monotonic()
+        checked, lag = self._lags.get(alias, (None, None))
+        if checked is None or now - checked > LAG_CHECK_INTERVAL:
+            lag = self.replication_lag(alias)
+            self._lags[alias] = (now, lag)
+        return lag
+
+    def healthy_replicas(self):
+        if self.max_lag is None:
+            return self.replicas
+        return [
+            alias
+            for alias in self.replicas
+            if (lag := self._lag(alias)) is not None and lag <= self.max_lag
+        ]
+
+    def db_for_read(self, model, **hints):
+        if not hints.get("search"):
+            return None
+        if _use_primary.get():
+            return self.primary
+        replicas = self.healthy_replicas()
+        if not replicas:
+            return self.primary
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # rows read from a replica are saved on the primary
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in self.replicas:
+            return self.primary
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {self.primary, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,21 @@
+"""
+In-process stand-in for ParadeDB, for fast application tests.
+
+A Django database backend built on SQLite, which evaluates the search lookups
+(`term_search`, `phrase_search`, `phrase_prefix_search`, `fuzzy_search`,
+`fuzzy_term_search`, `fuzzy_phrase_search`), `Score` and `Highlight` in
+Python, honoring the fields, tokenizer and stemmer of the `BM25Index`
+declarations:
+
+    DATABASES = {
+        "default": {
+            "ENGINE": "paradedb.standin",
+            "NAME": ":memory:",
+        }
+    }
+
+Matching is close to ParadeDB's, scores are not: they only account for the
+frequency of the matched terms in every row. Postgres indexes are not
+created, and the other lookups raise NotSupportedError. Keep a test suite
+running against ParadeDB as the reference.
+"""
@@ -0,0 +1,14 @@
+from django.db.backends.sqlite3 import base
+
+from . import expressions  # noqa: F401 adds the as_sqlite() methods
+from .schema import DatabaseSchemaEditor
+from .search import register_functions
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    SchemaEditorClass = DatabaseSchemaEditor
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        register_functions(connection)
+        return connection
@@ -0,0 +1,223 @@
+"""
+SQLite compilation of the ParadeDB lookups and functions, calling the
+functions of `paradedb.standin.search`.
+"""
+
+import json
+import re
+
+from django.db import NotSupportedError
+from django.db.models.sql.where import WhereNode
+
+from .. import querystring
+from ..functions import Highlight, MoreLikeThis, Score
+from ..indexes import BM25NgramIndex
+from ..lookups import (
+    BaseBM25FilterLookup,
+    BaseFuzzyParadeDBLookup,
+    BaseParadeDBLookup,
+    BoostSearchLookup,
+    FuzzySearchLookup,
+    JSONTermSearchLookup,
+    ParseSearchLookup,
+    QuerySearchLookup,
+    _adaptive_guards,
+    _adaptive_search_sql,
+    _bm25_index_for_model,
+    _col_from_lhs,
+    _model_from_lhs,
+    _with_bm25_condition,
+)
+
+
+_ESCAPED = re.compile(r"\\(.)")
+
+_KINDS = {
+    "term_search": "term",
+    "phrase_search": "phrase",
+    "phrase_prefix_search": "phrase_prefix",
+}
+
+
+def _unsupported(name):
+    return NotSupportedError(f"{name} isn't supported by the stand-in backend")
+
+
+def _is_search(node):
+    if isinstance(node, ParseSearchLookup):
+        return False
+    return isinstance(node, (BaseParadeDBLookup, FuzzySearchLookup))
+
+
+def _search_lookups(node):
+    # the search lookups of a WHERE clause, in order
+    if isinstance(node, WhereNode):
+        for child in node.children:
+            yield from _search_lookups(child)
+    elif _is_search(node):
+        yield node
+
+
+def _fuzzy(lookup):
+    if isinstance(lookup, FuzzySearchLookup):
+        return lookup.get_fuzzy()
+    if isinstance(lookup, BaseFuzzyParadeDBLookup):
+        return lookup.fuzzy
+    return None
+
+
+def lookup_spec(lookup, distance=None):
+    """
+    The JSON spec of a search lookup, with the tokenizer and stemmer of the
+    BM25Index covering its field. Fuzzy searches use `distance`, or the
+    distance of their `Fuzzy` value.
+    """
+    col = _col_from_lhs(lookup.lhs)
+    model = _model_from_lhs(col)
+    index = _bm25_index_for_model(model, col.target.name) if model else None
+    if index is None or not index.has_field(col.target.name):
+        raise NotSupportedError(
+            f"{col.target.name} isn't a field of a BM25Index, "
+            f"{lookup.lookup_name} can't search it"
+        )
+    spec = {"tokenizer": "default", "stemmer": index._stemmer}
+    if isinstance(index, BM25NgramIndex):
+        spec = {
+            "tokenizer": "ngram",
+            "min_gram": index._min_gram,
+            "max_gram": index._max_gram,
+        }
+
+    if isinstance(lookup, FuzzySearchLookup):
+        fuzzy = lookup.get_fuzzy()
+        text = fuzzy.text[0] if isinstance(fuzzy.text, (list, tuple)) else fuzzy.text
+        text = querystring.normalize_terms(text)
+        spec["conjunction"] = True
+    elif hasattr(lookup.rhs, "resolve_expression"):
+        raise _unsupported(f"{lookup.lookup_name} with an expression")
+    elif isinstance(lookup, BaseFuzzyParadeDBLookup):
+        fuzzy = lookup.fuzzy
+        text = lookup.rhs
+        spec["conjunction"] = lookup.match_all_terms == "true"
+    else:
+        fuzzy = None
+        text = _ESCAPED.sub(r"\1", lookup.rhs)
+        spec["kind"] = _KINDS[lookup.lookup_name]
+
+    if fuzzy is not None:
+        spec.update(
+            kind="fuzzy",
+            distance=fuzzy.distance if distance is None else distance,
+            prefix=fuzzy.prefix,
+            transposition_cost_one=fuzzy.transposition_cost_one,
+        )
+    spec["text"] = text
+    return json.dumps(spec, sort_keys=True)
+
+
+def _searcher(lookup, compiler):
+    # the search of lookup at a distance, see lookups._adaptive_guards
+    lhs_sql, lhs_params = compiler.compile(lookup.lhs)
+
+    def search(distance=None):
+        return f"paradedb_match({lhs_sql}, %s)", (
+            *lhs_params,
+            lookup_spec(lookup, distance),
+        )
+
+    return search
+
+
+def _at_search_distance(lookup, compiler, connection, function):
+    # function(spec) for the spec of lookup; for an adaptive fuzzy search, a
+    # CASE of it at the distance the search runs with
+    fuzzy = _fuzzy(lookup)
+    if fuzzy is None or not fuzzy.escalates:
+        return function(lookup_spec(lookup))
+    search = _searcher(lookup, compiler)
+    whens, params = [], []
+    guards = _adaptive_guards(lookup, fuzzy, search, compiler, connection)
+    for distance, (guard_sql, guard_params) in enumerate(guards):
+        sql, function_params = function(lookup_spec(lookup, distance))
+        whens.append(f"WHEN {guard_sql} THEN {sql}")
+        params += [*guard_params, *function_params]
+    return "CASE %s END" % " ".join(whens), params
+
+
+def search_as_sqlite(self, compiler, connection):
+    search = _searcher(self, compiler)
+    fuzzy = _fuzzy(self)
+    if fuzzy is not None and fuzzy.escalates:
+        sql, params = _adaptive_search_sql(self, fuzzy, search, compiler, connection)
+    else:
+        sql, params = search()
+    return _with_bm25_condition(self, sql, params, compiler, connection)
+
+
+def unsupported_as_sqlite(self, compiler, connection, **extra_context):
+    raise _unsupported(getattr(self, "lookup_name", self.__class__.__name__))
+
+
+def score_as_sqlite(self, compiler, connection, **extra_context):
+    # the sum of the scores of the searches on the table, there is no index
+    # to keep them
+    alias = self.table_alias(compiler)
+    parts, params = [], []
+    for lookup in _search_lookups(compiler.query.where):
+        if _col_from_lhs(lookup.lhs).alias != alias:
+            continue
+        lhs_sql, lhs_params = compiler.compile(lookup.lhs)
+        sql, score_params = _at_search_distance(
+            lookup,
+            compiler,
+            connection,
+            lambda spec: (f"paradedb_score({lhs_sql}, %s)", [*lhs_params, spec]),
+        )
+        parts.append(sql)
+        params += score_params
+    if not parts:
+        return "0.0", []
+    return "(%s)" % " + ".join(parts), params
+
+
+def highlight_as_sqlite(self, compiler, connection, **extra_context):
+    for lookup in _search_lookups(compiler.query.where):
+        col = _col_from_lhs(lookup.lhs)
+        if col.target.column != self._field or col.alias != compiler.query.base_table:
+            continue
+        lhs_sql, lhs_params = compiler.compile(lookup.lhs)
+        return _at_search_distance(
+            lookup,
+            compiler,
+            connection,
+            lambda spec: (
+                f"paradedb_snippet({lhs_sql}, %s, %s, %s, %s)",
+                [
+                    *lhs_params,
+                    spec,
+                    self._start_tag,
+                    self._end_tag,
+                    self._max_num_chars,
+                ],
+            ),
+        )
+    return "NULL", []
+
+
+def install():
+    BaseParadeDBLookup.as_sqlite = search_as_sqlite
+    FuzzySearchLookup.as_sqlite = search_as_sqlite
+    for cls in (
+        ParseSearchLookup,
+        QuerySearchLookup,
+        BoostSearchLookup,
+        JSONTermSearchLookup,
+        BaseBM25FilterLookup,
+        MoreLikeThis,
+    ):
+        cls.as_sqlite = unsupported_as_sqlite
+    Score.as_sqlite = score_as_sqlite
+    Highlight.as_sqlite = highlight_as_sqlite
+
+
+install()
@@ -0,0 +1,25 @@
+from django.contrib.postgres.indexes import PostgresIndex
+from django.db.backends.sqlite3.schema import (
+    DatabaseSchemaEditor as SQLiteDatabaseSchemaEditor,
+)
+
+
+class DatabaseSchemaEditor(SQLiteDatabaseSchemaEditor):
+    # BM25 and the other Postgres indexes only exist on Postgres, searches
+    # scan the tables
+
+    def _model_indexes_sql(self, model):
+        indexes = model._meta.indexes
+        model._meta.indexes = [i for i in indexes if not isinstance(i, PostgresIndex)]
+        try:
+            return super()._model_indexes_sql(model)
+        finally:
+            model._meta.indexes = indexes
+
+    def add_index(self, model, index):
+        if not isinstance(index, PostgresIndex):
+            super().add_index(model, index)
+
+    def remove_index(self, model, index):
+        if not isinstance(index, PostgresIndex):
+            super().remove_index(model, index)
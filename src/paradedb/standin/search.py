@@ -0,0 +1,193 @@
+"""
+Pure Python matching, scoring and highlighting for the stand-in backend,
+registered as SQLite functions on every connection.
+
+Every search lookup is compiled to a JSON spec of the query, e.g.
+
+    {"kind": "phrase", "text": "plastic keyboard", "tokenizer": "default",
+     "stemmer": "English"}
+
+which `paradedb_match(column, spec)`, `paradedb_score(column, spec)` and
+`paradedb_snippet(column, spec, start_tag, end_tag, max_num_chars)` evaluate
+against the text of every row.
+"""
+
+import functools
+import json
+import re
+
+
+_WORD = re.compile(r"\w+")
+
+# longest first
+_SUFFIXES = ("ingly", "edly", "ing", "ies", "ied", "es", "ed", "ly", "s")
+
+# BM25 term frequency saturation
+K1 = 1.2
+
+
+def stem(token):
+    # a crude English stemmer, close enough to match inflected forms
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    return token
+
+
+def edit_distance(a, b, transposition=True):
+    """
+    Levenshtein distance, counting the transposition of two adjacent
+    characters as one edit with `transposition`.
+    """
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            )
+            if transposition and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, previous2[j - 2] + 1)
+            current.append(cost)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def ngrams(token, min_gram=2, max_gram=3):
+    return {
+        token[i : i + n]
+        for n in range(min_gram, max_gram + 1)
+        for i in range(len(token) - n + 1)
+    }
+
+
+class Query:
+    def __init__(self, spec):
+        self.kind = spec["kind"]
+        self.ngram = spec.get("tokenizer") == "ngram"
+        self.gram_range = spec.get("min_gram", 2), spec.get("max_gram", 3)
+        self.stemmer = spec.get("stemmer") and not self.ngram
+        self.distance = spec.get("distance", 0)
+        self.prefix = spec.get("prefix", False)
+        self.transposition = spec.get("transposition_cost_one", True)
+        self.conjunction = spec.get("conjunction", False)
+        self.terms = self.tokenize(spec["text"])
+        if self.kind == "phrase_prefix" and self.terms:
+            # the last term is a prefix, don't stem it
+            self.terms[-1] = _WORD.findall(spec["text"].lower())[-1]
+
+    def tokenize(self, text):
+        tokens = _WORD.findall((text or "").lower())
+        if self.stemmer:
+            tokens = [stem(token) for token in tokens]
+        return tokens
+
+    def term_matches(self, term, token):
+        if self.kind == "fuzzy":
+            if self.prefix and len(token) > len(term):
+                token = token[: len(term)]
+            return edit_distance(term, token, self.transposition) <= self.distance
+        return term == token
+
+    def positions(self, tokens):
+        """
+        Positions of the tokens matched by the query, empty if the text
+        doesn't match.
+        """
+        if not self.terms:
+            return set()
+
+        if self.ngram:
+            grams = set().union(
+                *(ngrams(term, *self.gram_range) for term in self.terms)
+            )
+            return {
+                i
+                for i, token in enumerate(tokens)
+                if ngrams(token, *self.gram_range) & grams
+            }
+
+        if self.kind in ("phrase", "phrase_prefix"):
+            n, matched = len(self.terms), set()
+            for i in range(len(tokens) - n + 1):
+                window = tokens[i : i + n]
+                if window[:-1] != self.terms[:-1]:
+                    continue
+                last = window[-1]
+                if last == self.terms[-1] or (
+                    self.kind == "phrase_prefix" and last.startswith(self.terms[-1])
+                ):
+                    matched.update(range(i, i + n))
+            return matched
+
+        matched, terms_found = set(), set()
+        for i, token in enumerate(tokens):
+            for term in self.terms:
+                if self.term_matches(term, token):
+                    matched.add(i)
+                    terms_found.add(term)
+        if self.conjunction and terms_found != set(self.terms):
+            return set()
+        return matched
+
+    def matches(self, text):
+        return bool(self.positions(self.tokenize(text)))
+
+    def score(self, text):
+        tokens = self.tokenize(text)
+        positions = self.positions(tokens)
+        if not positions:
+            return 0.0
+        # BM25's term frequency saturation, without the corpus statistics
+        score = 0.0
+        for term in set(self.terms):
+            tf = sum(1 for i in positions if self.term_matches(term, tokens[i]))
+            score += tf * (K1 + 1) / (tf + K1)
+        return score or float(len(positions))
+
+    def snippet(self, text, start_tag, end_tag, max_num_chars):
+        words = list(_WORD.finditer(text or ""))
+        tokens = self.tokenize(" ".join(word.group() for word in words))
+        positions = sorted(self.positions(tokens))
+        if not positions:
+            return None
+
+        # start on a word boundary, with some context before the first match
+        first = words[positions[0]]
+        begin = max(0, first.start() - max_num_chars // 2)
+        begin = next(w.start() for w in words if w.end() > begin)
+        end = min(len(text), begin + max_num_chars)
+        out, cursor = [], begin
+        for i in positions:
+            word = words[i]
+            if word.end() > end:
+                break
+            out += [text[cursor : word.start()], start_tag, word.group(), end_tag]
+            cursor = word.end()
+        out.append(text[cursor:end])
+        return "".join(out)
+
+
+@functools.lru_cache(maxsize=256)
+def _query(spec):
+    return Query(json.loads(spec))
+
+
+def match(text, spec):
+    return text is not None and _query(spec).matches(text)
+
+
+def score(text, spec):
+    return _query(spec).score(text) if text is not None else 0.0
+
+
+def snippet(text, spec, start_tag, end_tag, max_num_chars):
+    return _query(spec).snippet(text, start_tag, end_tag, max_num_chars)
+
+
+def register_functions(connection):
+    connection.create_function("paradedb_match", 2, match, deterministic=True)
+    connection.create_function("paradedb_score", 2, score, deterministic=True)
+    connection.create_function("paradedb_snippet", 5, snippet, deterministic=True)
@@ -0,0 +1,132 @@
+"""
+Warming up the BM25 indexes after a restart or a failover, before a node
+takes traffic.
+
+`prewarm()` loads every BM25 index declared on the installed models, and the
+tables they index, into the buffer cache with pg_prewarm. `replay()` then runs
+a recorded sample of searches, so that ParadeDB's segment readers are open and
+hot too. Both are run by the `bm25_warmup` management command:
+
+    python manage.py bm25_warmup --queries top_searches.jsonl --concurrency 4
+
+The recorded searches are JSON lines naming the model and the filter of the
+search, and optionally how many rows to fetch (10 by default):
+
+    {"model": "testapp.Book", "filter": {"description__term_search": "dragons"}}
+
+The pg_prewarm extension must be installed beforehand, by a superuser and on
+the primary, standbys get it through replication:
+
+    CREATE EXTENSION pg_prewarm;
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .functions import Score
+from .indexes import BM25Index
+
+
+logger = logging.getLogger("paradedb.warmup")
+
+
+def bm25_indexes(models=None):
+    """
+    Yields `(model, index)` for every BM25Index of `models`, all the installed
+    models by default.
+    """
+    for model in models or apps.get_models():
+        for index in model._meta.indexes:
+            if isinstance(index, BM25Index):
+                yield model, index
+
+
+def _relations(model, index, heap):
+    # partitioned tables and their indexes have no storage of their own
+    if index._partitions:
+        for partition in index._partitions:
+            yield index.partition_index_name(partition)
+            if heap:
+                yield partition
+    else:
+        yield index.name
+        if heap:
+            yield model._meta.db_table
+
+
+def prewarm(using=DEFAULT_DB_ALIAS, models=None, heap=True, mode="buffer"):
+    """
+    Loads the BM25 indexes, and with `heap` the tables they index, into the
+    buffer cache. `mode` is pg_prewarm's: "buffer", "read" or "prefetch".
+    Returns `{relation: number of blocks loaded}`.
+
+    Raises ImproperlyConfigured if the pg_prewarm extension isn't installed.
+    """
+    blocks = {}
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'")
+        if cursor.fetchone() is None:
+            raise ImproperlyConfigured(
+                f"The pg_prewarm extension isn't installed in the {using!r} "
+                "database, run CREATE EXTENSION pg_prewarm as a superuser"
+            )
+        for model, index in bm25_indexes(models):
+            for relation in _relations(model, index, heap):
+                if relation in blocks:
+                    continue
+                cursor.execute("SELECT pg_prewarm(%s::regclass, %s)", [relation, mode])
+                blocks[relation] = cursor.fetchone()[0]
+    return blocks
+
+
+def load_queries(fileobj):
+    """
+    Reads recorded searches, one JSON object per line.
+    """
+    queries = []
+    for line in fileobj:
+        line = line.strip()
+        if line:
+            queries.append(json.loads(line))
+    return queries
+
+
+def _run_query(query, using):
+    try:
+        model = apps.get_model(query["model"])
+        qs = (
+            model._default_manager.using(using)
+            .filter(**query["filter"])
+            .annotate(score=Score())
+            .order_by("-score")
+        )
+        return len(qs[: query.get("limit", 10)])
+    finally:
+        # every worker thread has its own connection
+        connections[using].close()
+
+
+def replay(queries, using=DEFAULT_DB_ALIAS, concurrency=4):
+    """
+    Runs the recorded searches, at most `concurrency` at a time. Returns the
+    `(query, exception)` pairs of the searches which failed, each failure is
+    also logged to the "paradedb.warmup" logger.
+    """
+    failures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_run_query, query, using) for query in queries]
+        for query, future in zip(queries, futures, strict=True):
+            exception = future.exception()
+            if exception is not None:
+                logger.warning(
+                    "Warmup search failed: %s",
+                    json.dumps(query),
+                    exc_info=exception,
+                )
+                failures.append((query, exception))
+    return failures
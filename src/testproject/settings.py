@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.postgres",
+    "paradedb",
     "testapp",
 ]
 
@@ -64,7 +65,16 @@ DATABASES = {
         "TEST": {
             "MIGRATE": False,
         },
-    }
+    },
+    # in-process stand-in, see paradedb.standin
+    "standin": {
+        "ENGINE": "paradedb.standin",
+        "NAME": ":memory:",
+        "TEST": {
+            "MIGRATE": False,
+            "DEPENDENCIES": [],
+        },
+    },
 }
 
 STATIC_URL = "/static/"
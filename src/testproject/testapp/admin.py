@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from paradedb.admin import ParadeDBSearchAdminMixin
+
+from .models import Book, Item
+
+
+@admin.register(Item)
+class ItemAdmin(ParadeDBSearchAdminMixin, admin.ModelAdmin):
+    list_display = ("name", "rating")
+    search_fields = ("name", "description")
+    search_rank = True
+
+
+@admin.register(Book)
+class BookAdmin(ParadeDBSearchAdminMixin, admin.ModelAdmin):
+    list_display = ("title", "publication_year", "average_rating")
+    search_fields = ("title", "description")
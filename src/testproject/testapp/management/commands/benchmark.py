@@ -25,7 +25,8 @@ class Command(BaseCommand):
         row_count = Book.objects.count()
         if row_count < 100:
             print(
-                "Download and import benchmark data, see `python manage.py import_data`"
+                "Download and import benchmark data, see `python manage.py import_data`, "
+                "or generate it with `python manage.py generate_corpus`"
             )
             return
 
@@ -0,0 +1,186 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from paradedb.functions import Highlight, MoreLikeThis, Score
+
+from ...models import Article, Book, Item, Review
+
+
+# name: (queryset factory, maximum ratio to the baseline compile time)
+CASES = {
+    "exact (baseline)": (lambda: Item.objects.filter(description="music"), None),
+    "icontains": (lambda: Item.objects.filter(description__icontains="music"), 2),
+    "term_search": (
+        lambda: Item.objects.filter(description__term_search="music sheets"),
+        3,
+    ),
+    "phrase_search": (
+        lambda: Item.objects.filter(description__phrase_search="music sheets"),
+        3,
+    ),
+    "phrase_prefix_search": (
+        lambda: Item.objects.filter(description__phrase_prefix_search="music she"),
+        3,
+    ),
+    "parse_search": (
+        lambda: Item.objects.filter(
+            description__parse_search='music AND (sheets OR name:"piano")'
+        ),
+        5,
+    ),
+    "query_search": (
+        lambda: Item.objects.filter(description__query_search="music sheets"),
+        3,
+    ),
+    "boost_search": (
+        lambda: Item.objects.filter(description__boost_search=("music", 2)),
+        3,
+    ),
+    "fuzzy_search": (
+        lambda: Item.objects.filter(description__fuzzy_search=("music", 1)),
+        3,
+    ),
+    "fuzzy_term_search": (
+        lambda: Item.objects.filter(description__fuzzy_term_search="muzic"),
+        3,
+    ),
+    "fuzzy_phrase_search": (
+        lambda: Item.objects.filter(description__fuzzy_phrase_search="muzic shets"),
+        3,
+    ),
+    "bm25_range": (lambda: Item.objects.filter(rating__bm25_range=(1, 3)), 3),
+    "bm25_term": (lambda: Book.objects.filter(publication_year__bm25_term=2000), 3),
+    "json_term_search": (
+        lambda: Article.objects.filter(metadata__json_term_search__author="tolkien"),
+        4,
+    ),
+    "partial index": (lambda: Article.objects.filter(body__term_search="x"), 4),
+    "more_like_this": (lambda: Item.objects.filter(MoreLikeThis(1)), 3),
+    "score + highlight": (
+        lambda: Item.objects.filter(description__term_search="music").annotate(
+            score=Score(), hl=Highlight("description")
+        ),
+        4,
+    ),
+    "joined score": (
+        lambda: Review.objects.filter(
+            Q(item__description__term_search="music")
+            | Q(review__fuzzy_phrase_search="great")
+        ).annotate(score=Score("item__description")),
+        5,
+    ),
+}
+
+
+def compile_sql(factory):
+    return factory().query.get_compiler(DEFAULT_DB_ALIAS).as_sql()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time and memory Django needs to build and compile the "
+        "SQL of ParadeDB lookups and functions, without a database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument("--samples", type=int, default=3)
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=200,
+            help="Untimed iterations of every case before the samples",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            default=False,
+            help="Fail when a case is slower than its maximum ratio to the baseline",
+        )
+        parser.add_argument("--json", type=str, help="Write the results to this file")
+
+    def sample(self, factory, iterations):
+        # seconds to build `iterations` querysets, and to build and compile them
+        t = time.perf_counter()
+        for _ in range(iterations):
+            factory()
+        build = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for _ in range(iterations):
+            compile_sql(factory)
+        return build, time.perf_counter() - t
+
+    def peak_kib(self, factory):
+        tracemalloc.start()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        compile_sql(factory)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return (peak - current) / 1024
+
+    def measure(self, iterations, samples, warmup):
+        # every case is warmed up before any is timed, then the samples
+        # interleave the cases, so that neither the first case nor a drift
+        # of the machine biases the ratios to the baseline
+        for factory, _ in CASES.values():
+            for _ in range(warmup):
+                compile_sql(factory)
+
+        timings = {name: ([], []) for name in CASES}
+        for _ in range(samples):
+            for name, (factory, _) in CASES.items():
+                build, total = self.sample(factory, iterations)
+                timings[name][0].append(build)
+                timings[name][1].append(total)
+
+        # best of `samples`, in microseconds per queryset
+        results = {}
+        for name, (build, total) in timings.items():
+            build_us = min(build) / iterations * 1e6
+            total_us = min(total) / iterations * 1e6
+            results[name] = {
+                "build_us": build_us,
+                "compile_us": max(total_us - build_us, 0),
+                "total_us": total_us,
+                "peak_kib": self.peak_kib(CASES[name][0]),
+            }
+        return results
+
+    def handle(self, **options):
+        results = self.measure(
+            options["iterations"], options["samples"], options["warmup"]
+        )
+
+        baseline = results["exact (baseline)"]["total_us"]
+        failures = []
+        self.stdout.write(
+            f"{'case':<24}{'build µs':>10}{'compile µs':>12}{'total µs':>10}"
+            f"{'ratio':>8}{'max':>6}{'peak KiB':>10}"
+        )
+        for name, result in results.items():
+            max_ratio = CASES[name][1]
+            result["ratio"] = result["total_us"] / baseline
+            result["max_ratio"] = max_ratio
+            self.stdout.write(
+                f"{name:<24}{result['build_us']:>10.1f}{result['compile_us']:>12.1f}"
+                f"{result['total_us']:>10.1f}{result['ratio']:>8.2f}"
+                f"{max_ratio or '':>6}{result['peak_kib']:>10.1f}"
+            )
+            if max_ratio is not None and result["ratio"] > max_ratio:
+                failures.append(name)
+
+        if options.get("json"):
+            with open(options["json"], "w") as f:
+                json.dump(results, f, indent=2)
+
+        if options["check"] and failures:
+            raise CommandError(
+                f"Compilation overhead regression: {', '.join(failures)}"
+            )
@@ -0,0 +1,221 @@
+import json
+import random
+import re
+import statistics
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+from paradedb.functions import Score
+from paradedb.indexes import BM25Index, BM25NgramIndex
+
+
+def _text_fields(model, index):
+    return [
+        name
+        for name in index.fields
+        if model._meta.get_field(name).get_internal_type() in ("CharField", "TextField")
+    ]
+
+
+# name: factory of the index variant, from the model and its declared index
+VARIANTS = {
+    "declared": lambda model, index: index,
+    "no stemmer": lambda model, index: BM25Index(
+        fields=index.fields,
+        name=index.name,
+        condition=index.condition,
+        key_field=index._key_field,
+        stemmer=None,
+    ),
+    "text not fast": lambda model, index: BM25Index(
+        fields=index.fields,
+        name=index.name,
+        condition=index.condition,
+        key_field=index._key_field,
+        stemmer=index._stemmer,
+        text_fields={name: {"fast": False} for name in _text_fields(model, index)},
+    ),
+    "ngram 2-3": lambda model, index: BM25NgramIndex(
+        fields=index.fields,
+        name=index.name,
+        condition=index.condition,
+        key_field=index._key_field,
+    ),
+    "ngram 3-5": lambda model, index: BM25NgramIndex(
+        fields=index.fields,
+        name=index.name,
+        condition=index.condition,
+        key_field=index._key_field,
+        min_gram=3,
+        max_gram=5,
+    ),
+}
+
+# name: lookups of the query mix, from the field and two words of the data
+QUERIES = {
+    "term": lambda field, a, b: {f"{field}__term_search": f"{a} {b}"},
+    "phrase": lambda field, a, b: {f"{field}__phrase_search": f"{a} {b}"},
+    "phrase_prefix": lambda field, a, b: {
+        f"{field}__phrase_prefix_search": f"{a} {b[:3]}"
+    },
+    "fuzzy": lambda field, a, b: {f"{field}__fuzzy_term_search": f"{a[:-1]}x"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds every variant of the BM25 index of a model on its current data, "
+        "and compares their build time, size, segments and search latency. The "
+        "declared index is dropped and restored in a transaction, which locks "
+        "the table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default="testapp.Book")
+        parser.add_argument("--field", help="Text field searched by the query mix")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS)
+        )
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", type=str, help="Write the results to this file")
+
+    def query_mix(self, model, field, using, count, seed):
+        # the same searches for every variant, from words of the first rows
+        texts = (
+            model._default_manager.using(using)
+            .order_by("pk")
+            .values_list(field, flat=True)[:500]
+        )
+        words = sorted(
+            {
+                w
+                for text in texts
+                for w in re.findall(r"[a-z]{5,}", (text or "").lower())
+            }
+        )
+        if len(words) < 2:
+            raise CommandError(f"Not enough data in {model.__name__}.{field}")
+        rng = random.Random(seed)
+        kinds = list(QUERIES)
+        return [
+            (kinds[i % len(kinds)], QUERIES[kinds[i % len(kinds)]](field, *pair))
+            for i, pair in enumerate(rng.sample(words, 2) for _ in range(count))
+        ]
+
+    def measure(self, model, declared, index, queries, using):
+        connection = connections[using]
+        result = {}
+        with connection.schema_editor(atomic=False) as editor:
+            editor.remove_index(model, declared)
+            t = time.perf_counter()
+            editor.add_index(model, index)
+            result["build_s"] = time.perf_counter() - t
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_relation_size(%s::regclass)", [index.name])
+            result["size_bytes"] = cursor.fetchone()[0]
+            try:
+                with transaction.atomic(using=using):
+                    cursor.execute(
+                        "SELECT count(*) FROM paradedb.index_info(%s::regclass)",
+                        [index.name],
+                    )
+                    result["segments"] = cursor.fetchone()[0]
+            except DatabaseError:
+                # index_info() isn't available on every ParadeDB version
+                result["segments"] = None
+
+        latencies = {kind: [] for kind in QUERIES}
+        errors = 0
+        for kind, lookups in queries:
+            qs = (
+                model._default_manager.using(using)
+                .filter(**lookups)
+                .annotate(score=Score())
+                .order_by("-score")
+                .values_list("pk", flat=True)[:10]
+            )
+            t = time.perf_counter()
+            try:
+                with transaction.atomic(using=using):
+                    list(qs)
+            except DatabaseError:
+                errors += 1
+                continue
+            latencies[kind].append((time.perf_counter() - t) * 1000)
+
+        timings = sorted(ms for values in latencies.values() for ms in values)
+        result["errors"] = errors
+        result["mean_ms"] = statistics.fmean(timings) if timings else None
+        result["p95_ms"] = (
+            timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else None
+        )
+        result["mean_ms_by_query"] = {
+            kind: statistics.fmean(values) if values else None
+            for kind, values in latencies.items()
+        }
+        return result
+
+    def handle(self, **options):
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        declared = next(
+            (i for i in model._meta.indexes if isinstance(i, BM25Index)), None
+        )
+        if declared is None:
+            raise CommandError(f"{model.__name__} has no BM25Index")
+        if declared._partitions:
+            raise CommandError("Partitioned BM25 indexes can't be benchmarked")
+        field = options["field"] or next(iter(_text_fields(model, declared)), None)
+        if field is None:
+            raise CommandError(f"{declared.name} has no text field to search")
+
+        using = options["database"]
+        queries = self.query_mix(
+            model, field, using, options["queries"], options["seed"]
+        )
+        results = {}
+        for name in options["variants"]:
+            index = VARIANTS[name](model, declared)
+            self.stdout.write(f"Building {name}...")
+            # every variant replaces the declared index, until the rollback
+            with transaction.atomic(using=using):
+                results[name] = self.measure(model, declared, index, queries, using)
+                transaction.set_rollback(True, using=using)
+
+        def fmt(value, spec):
+            return "-" if value is None else format(value, spec)
+
+        self.stdout.write(
+            f"{'variant':<16}{'build s':>10}{'size MiB':>10}{'segments':>10}"
+            f"{'mean ms':>10}{'p95 ms':>10}{'errors':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<16}{result['build_s']:>10.2f}"
+                f"{result['size_bytes'] / 2**20:>10.2f}"
+                f"{fmt(result['segments'], 'd'):>10}"
+                f"{fmt(result['mean_ms'], '.2f'):>10}"
+                f"{fmt(result['p95_ms'], '.2f'):>10}{result['errors']:>8}"
+            )
+
+        if options.get("json"):
+            with open(options["json"], "w") as f:
+                json.dump(
+                    {
+                        "model": model._meta.label,
+                        "field": field,
+                        "rows": model._default_manager.using(using).count(),
+                        "queries": len(queries),
+                        "variants": results,
+                    },
+                    f,
+                    indent=2,
+                )
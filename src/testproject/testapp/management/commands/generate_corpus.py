@@ -0,0 +1,213 @@
+import io
+import itertools
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ...models import Book, BookReview
+
+
+class NoProgress:
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+def progress(total):
+    # tqdm is only installed in the benchmark environment
+    try:
+        import tqdm
+    except ImportError:
+        return NoProgress()
+    return tqdm.tqdm(total=total, disable=bool(os.environ.get("SILENT_TQDM")))
+
+
+SYLLABLES = [
+    c + v
+    for c in "bcdfghjklmnprstvwz"
+    for v in ("a", "e", "i", "o", "u", "ai", "ou", "ar", "en", "or")
+]
+
+
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class Corpus:
+    """
+    Deterministic generator of synthetic books and reviews: words are drawn
+    from a Zipfian distribution over a fixed vocabulary, text lengths follow a
+    log-normal distribution, the number of reviews per book an exponential one.
+
+    The vocabulary only depends on `seed`, the rows on `seed` and `first_pk`,
+    so that appending to a corpus generates new rows over the same words.
+    """
+
+    def __init__(self, seed, vocabulary_size, zipf_exponent, first_pk=1):
+        rng = random.Random(seed)
+        words = set()
+        while len(words) < vocabulary_size:
+            words.add("".join(rng.choices(SYLLABLES, k=rng.choice((1, 2, 2, 3, 3, 4)))))
+        self.vocabulary = sorted(words)
+        rng.shuffle(self.vocabulary)
+        self.rng = random.Random(f"{seed}:{first_pk}")
+        self.cum_weights = list(
+            itertools.accumulate(
+                1 / rank**zipf_exponent for rank in range(1, vocabulary_size + 1)
+            )
+        )
+        self.epoch = datetime(2010, 1, 1, tzinfo=timezone.utc)
+
+    def words(self, mean, sigma=0.6, minimum=1):
+        # log-normal length with the given mean
+        count = max(
+            minimum, int(self.rng.lognormvariate(math.log(mean) - sigma**2 / 2, sigma))
+        )
+        return " ".join(
+            self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+        )
+
+    def book(self, pk):
+        rng = self.rng
+        return (
+            pk,
+            self.words(4, sigma=0.4).title()[:512],
+            "978%010d" % rng.randrange(10**10),
+            "%.2f" % min(5, max(1, rng.gauss(3.9, 0.35))),
+            int(rng.paretovariate(1.2)) - 1,
+            self.words(120),
+            f"https://example.com/book/{pk}",
+            f"https://example.com/book/{pk}.jpg",
+            max(10, int(rng.gauss(300, 120))),
+            # skewed towards recent years
+            2024 - int(rng.expovariate(1 / 15)) % 100,
+            pk,
+        )
+
+    def reviews(self, book_pk, mean):
+        for _ in range(int(self.rng.expovariate(1 / mean)) if mean else 0):
+            added = self.epoch + timedelta(seconds=self.rng.randrange(15 * 365 * 86400))
+            yield (book_pk, added.isoformat(), self.words(60))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a deterministic synthetic corpus of books and book reviews "
+        "of arbitrary size, without network access"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=100_000)
+        parser.add_argument(
+            "--reviews-per-book",
+            type=float,
+            default=3,
+            help="Mean number of reviews per book",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--vocabulary", type=int, default=50_000)
+        parser.add_argument("--zipf-exponent", type=float, default=1.1)
+        parser.add_argument("--batch-size", type=int, default=50_000)
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            default=False,
+            help="Keep the existing rows instead of truncating the tables",
+        )
+
+    def copy(self, cursor, model, columns, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor.copy_expert(
+            "COPY %s (%s) FROM STDIN"
+            % (
+                connection.ops.quote_name(model._meta.db_table),
+                ", ".join(connection.ops.quote_name(c) for c in columns),
+            ),
+            buffer,
+        )
+
+    def handle(self, **options):
+        book_columns = [
+            Book._meta.get_field(name).column
+            for name in (
+                "id",
+                "title",
+                "isbn",
+                "average_rating",
+                "ratings_count",
+                "description",
+                "url",
+                "image_url",
+                "pages",
+                "publication_year",
+                "ext_id",
+            )
+        ]
+        review_columns = [
+            BookReview._meta.get_field(name).column
+            for name in ("book", "added", "review")
+        ]
+        batch_size = options["batch_size"]
+
+        with connection.cursor() as cursor:
+            if options["append"]:
+                cursor.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM %s" % Book._meta.db_table
+                )
+                first_pk = cursor.fetchone()[0] + 1
+            else:
+                cursor.execute(
+                    "TRUNCATE %s, %s RESTART IDENTITY"
+                    % (BookReview._meta.db_table, Book._meta.db_table)
+                )
+                first_pk = 1
+            corpus = Corpus(
+                options["seed"],
+                options["vocabulary"],
+                options["zipf_exponent"],
+                first_pk,
+            )
+
+            last_pk = first_pk + options["books"]
+            review_count = 0
+            prog = progress(options["books"])
+            for start in range(first_pk, last_pk, batch_size):
+                books, reviews = [], []
+                for pk in range(start, min(start + batch_size, last_pk)):
+                    books.append(corpus.book(pk))
+                    reviews.extend(corpus.reviews(pk, options["reviews_per_book"]))
+                self.copy(cursor, Book, book_columns, books)
+                self.copy(cursor, BookReview, review_columns, reviews)
+                review_count += len(reviews)
+                prog.update(len(books))
+            prog.close()
+
+            for model in (Book, BookReview):
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    "(SELECT COALESCE(MAX(id), 1) FROM {}))".format(
+                        model._meta.db_table
+                    ),
+                    [model._meta.db_table],
+                )
+                cursor.execute("ANALYZE %s" % model._meta.db_table)
+
+        self.stdout.write(f"Generated {options['books']} books, {review_count} reviews")
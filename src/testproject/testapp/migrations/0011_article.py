@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:32
+
+import paradedb.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("testapp", "0010_auto_20250406_0734"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Article",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("body", models.TextField()),
+                ("published", models.BooleanField(default=False)),
+            ],
+            options={
+                "verbose_name": "Article",
+                "verbose_name_plural": "Articles",
+                "indexes": [
+                    paradedb.indexes.BM25Index(
+                        condition=models.Q(("published", True)),
+                        fields=["title", "body"],
+                        name="article_idx",
+                    )
+                ],
+            },
+        ),
+    ]
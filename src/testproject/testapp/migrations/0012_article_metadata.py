@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:34
+
+import paradedb.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("testapp", "0011_article"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="article",
+            name="article_idx",
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="metadata",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=paradedb.indexes.BM25Index(
+                condition=models.Q(("published", True)),
+                fields=["title", "body", "metadata"],
+                name="article_idx",
+            ),
+        ),
+    ]
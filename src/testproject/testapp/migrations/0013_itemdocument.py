@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:51
+
+import django.db.models.deletion
+import paradedb.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("testapp", "0012_article_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemDocument",
+            fields=[
+                (
+                    "source",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="document",
+                        serialize=False,
+                        to="testapp.item",
+                    ),
+                ),
+                ("name", models.TextField()),
+                ("description", models.TextField()),
+                ("reviews", models.TextField()),
+            ],
+            options={
+                "indexes": [
+                    paradedb.indexes.BM25Index(
+                        fields=["name", "description", "reviews"],
+                        name="item_document_idx",
+                    )
+                ],
+            },
+        ),
+    ]
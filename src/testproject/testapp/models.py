@@ -2,7 +2,9 @@ from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
+from paradedb.documents import SearchDocument
 from paradedb.indexes import BM25Index
+from paradedb.querysets import ParadeDBManager
 
 
 class Item(models.Model):
@@ -11,6 +13,8 @@ class Item(models.Model):
     alt_name = models.CharField(max_length=64, blank=True, null=True)
     rating = models.DecimalField(max_digits=3, decimal_places=2)
 
+    objects = ParadeDBManager()
+
     class Meta:
         ordering = ("-pk",)
         verbose_name = "Item"
@@ -38,6 +42,8 @@ class Review(models.Model):
     added = models.DateTimeField(auto_now_add=True)
     review = models.TextField()
 
+    objects = ParadeDBManager()
+
     class Meta:
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
@@ -70,6 +76,8 @@ class Book(models.Model):
 
     vector_column = SearchVectorField(null=True)
 
+    objects = ParadeDBManager()
+
     class Meta:
         ordering = ("-pk",)
         verbose_name = "Book"
@@ -94,6 +102,8 @@ class BookReview(models.Model):
     added = models.DateTimeField(auto_now_add=True)
     review = models.TextField()
 
+    objects = ParadeDBManager()
+
     class Meta:
         verbose_name = "Book Review"
         verbose_name_plural = "Book Reviews"
@@ -108,3 +118,55 @@ class BookReview(models.Model):
 
     def __str__(self):
         return self.book.__str__()
+
+
+class Article(models.Model):
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    published = models.BooleanField(default=False)
+    metadata = models.JSONField(default=dict, blank=True)
+
+    objects = ParadeDBManager()
+
+    class Meta:
+        verbose_name = "Article"
+        verbose_name_plural = "Articles"
+
+        indexes = [
+            # Only published articles are ever searched
+            BM25Index(
+                fields=["title", "body", "metadata"],
+                name="article_idx",
+                condition=models.Q(published=True),
+            )
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ItemDocument(SearchDocument):
+    """
+    Items and their reviews, searchable with a single index scan
+    """
+
+    source = models.OneToOneField(
+        Item, on_delete=models.CASCADE, primary_key=True, related_name="document"
+    )
+    name = models.TextField()
+    description = models.TextField()
+    reviews = models.TextField()
+
+    search_fields = {
+        "name": "name",
+        "description": "description",
+        "reviews": "review__review",
+    }
+
+    class Meta:
+        indexes = [
+            BM25Index(
+                fields=["name", "description", "reviews"],
+                name="item_document_idx",
+            )
+        ]
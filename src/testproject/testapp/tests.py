@@ -1,9 +1,39 @@
-from testapp.models import Item, Review
+import csv
+import io
+import json
+import tempfile
+import time
+from unittest import mock
 
-from django.db.models import Q
-from django.test import TestCase
+from testapp.admin import ItemAdmin
+from testapp.models import Article, Book, BookReview, Item, ItemDocument, Review
 
-from paradedb.functions import Highlight, Score
+from django.contrib.auth.models import User
+from django.core.exceptions import FieldError, MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import NotSupportedError, OperationalError, connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+
+from paradedb import federated, profile
+from paradedb.export import copy_to, export_csv, export_jsonl, iter_rows
+from paradedb.functions import Highlight, MoreLikeThis, Score
+from paradedb.indexes import BM25Index
+from paradedb.lookups import Fuzzy
+from paradedb.plans import SearchPlan, search_plan_served
+from paradedb.querystring import QueryStringError, normalize, normalize_terms, parse
+from paradedb.routers import SearchRouter, use_primary
+from paradedb.warmup import bm25_indexes, prewarm, replay
 
 
 class ParadeDBCase(TestCase):
@@ -57,6 +87,74 @@ class ParadeDBCase(TestCase):
             == 1
         )
 
+    def test_fuzzy_options(self):
+        def pks(value):
+            return set(
+                Item.objects.filter(description__fuzzy_term_search=value).values_list(
+                    "pk", flat=True
+                )
+            )
+
+        self.assertTrue(pks(Fuzzy("Colpoys", distance=0)))
+        self.assertFalse(pks(Fuzzy("Colpoyz", distance=0)))
+        self.assertTrue(pks(Fuzzy("Colpoyz", distance=1)))
+        self.assertFalse(
+            pks(Fuzzy("Colpyos", distance=1, transposition_cost_one=False))
+        )
+        self.assertTrue(pks(Fuzzy("Colpyos", distance=1)))
+        self.assertTrue(pks(Fuzzy("Colpo", distance=0, prefix=True)))
+        self.assertEqual(
+            Item.objects.filter(
+                description__fuzzy_search=Fuzzy("colpoyz", distance=1)
+            ).count(),
+            len(pks(Fuzzy("Colpoyz", distance=1))),
+        )
+        with self.assertRaises(ValueError):
+            Fuzzy("Colpoys", distance=3)
+
+    def test_adaptive_fuzzy_lookup(self):
+        def pks(value):
+            return set(
+                Item.objects.filter(description__fuzzy_phrase_search=value).values_list(
+                    "pk", flat=True
+                )
+            )
+
+        # an exact hit doesn't widen the search to distance 2
+        self.assertEqual(
+            pks(Fuzzy("Colpoys", adaptive=True)), pks(Fuzzy("Colpoys", distance=0))
+        )
+        self.assertLess(
+            len(pks(Fuzzy("Colpoys", distance=0))),
+            len(pks(Fuzzy("Colpoys", distance=2))),
+        )
+        # without enough hits, it escalates to the first distance having them
+        self.assertEqual(
+            pks(Fuzzy("Cololys", adaptive=True)), pks(Fuzzy("Cololys", distance=2))
+        )
+        self.assertEqual(
+            pks(Fuzzy("Colpoys", adaptive=True, min_hits=5)),
+            pks(Fuzzy("Colpoys", distance=2)),
+        )
+        self.assertEqual(
+            pks(Fuzzy("Cololys", distance=1, adaptive=True)),
+            pks(Fuzzy("Cololys", distance=1)),
+        )
+        with self.assertRaises(ValueError):
+            Fuzzy("Colpoys", adaptive=True, min_hits=0)
+
+        # every search and probe has a constant distance, the value isn't
+        # escaped
+        sql, params = Item.objects.filter(
+            description__fuzzy_term_search=Fuzzy("don't (muzik)", adaptive=True)
+        ).query.sql_with_params()
+        self.assertEqual(sql.count("EXISTS (SELECT 1 FROM"), 5)
+        self.assertIn("LIMIT 1 OFFSET 0", sql)
+        self.assertIn("don't (muzik)", params)
+        self.assertEqual(
+            [p for p in params if isinstance(p, int)], [0, 0, 0, 1, 1, 0, 1, 2]
+        )
+
     def test_score_sorting(self):
         # annotated but unsorted
         qs = Item.objects.filter(description__term_search="music").annotate(
@@ -181,3 +279,980 @@ class ParadeDBCase(TestCase):
         r1, r2 = reviews
 
         assert r1.score > r2.score
+
+    def test_partial_index(self):
+        Article.objects.create(title="Dragons", body="dragons", published=True)
+        Article.objects.create(title="Dragons draft", body="dragons", published=False)
+
+        qs = Article.objects.filter(body__term_search="dragons")
+        self.assertIn('AND "testapp_article"."published"', str(qs.query))
+        self.assertEqual(qs.count(), 1)
+        self.assertEqual(qs.get().title, "Dragons")
+
+        # excluding searches within the index, not the rows outside of it
+        Article.objects.create(title="Wyverns", body="wyverns", published=True)
+        qs = Article.objects.exclude(body__term_search="dragons")
+        self.assertIn('OR NOT ("testapp_article"."published")', str(qs.query))
+        self.assertEqual([article.title for article in qs], ["Wyverns"])
+
+        with connection.schema_editor(collect_sql=True) as editor:
+            sql = str(Article._meta.indexes[0].create_sql(Article, editor))
+        self.assertTrue(sql.endswith(' WHERE "published"'))
+        self.assertIn("WITH (key_field='id'", sql)
+
+    def test_fast_fields(self):
+        index = BM25Index(
+            fields=["title", "isbn", "description", "publication_year"],
+            name="book_idx",
+            text_fields={
+                "isbn": {"tokenizer": {"type": "raw"}},
+                "title": {"fast": False, "tokenizer": {"type": "keyword"}},
+            },
+        )
+        self.assertTrue(index.is_fast_field(Book, "publication_year"))
+        self.assertTrue(index.is_fast_field(Book, "isbn"))
+        self.assertFalse(index.is_fast_field(Book, "title"))
+        self.assertFalse(index.is_fast_field(Book, "description"))
+        self.assertFalse(index.is_fast_field(Book, "average_rating"))
+
+    def test_partitioned_index_sql(self):
+        index = BM25Index(
+            fields=["title", "body"],
+            name="article_idx",
+            partitions=["testapp_article_2024", "testapp_article_2025"],
+        )
+        with connection.schema_editor(collect_sql=True) as editor:
+            sql = str(index.create_sql(Article, editor))
+
+        self.assertIn('CREATE INDEX "article_idx" ON ONLY "testapp_article"', sql)
+        self.assertIn(
+            'CREATE INDEX "testapp_article_2024_bm25_idx" ON "testapp_article_2024"',
+            sql,
+        )
+        self.assertIn(
+            'ALTER INDEX "article_idx" ATTACH PARTITION "testapp_article_2025_bm25_idx"',
+            sql,
+        )
+        self.assertEqual(index.deconstruct()[2]["partitions"], index._partitions)
+
+    def test_partition_search(self):
+        index = BM25Index(
+            fields=["review"],
+            name="review_idx",
+            partition_field="item",
+            partitions={"testapp_review_a": [99, 100], "testapp_review_b": 101},
+        )
+        self.assertEqual(index.partition_for(101), "testapp_review_b")
+        self.assertIsNone(index.partition_for(1))
+        self.assertEqual(index.deconstruct()[2]["partition_field"], "item")
+
+        with mock.patch.object(Review._meta, "indexes", [index]):
+            self.assertEqual(
+                Review.objects.for_partition(101)
+                .filter(review__term_search="something")
+                .count(),
+                1,
+            )
+            with self.assertRaises(ValueError):
+                Review.objects.for_partition(1)
+
+            qs = Review.objects.filter(review__term_search="something")
+            top = list(qs.top_k_by_partition(1))
+            self.assertIn("UNION ALL", str(qs.top_k_by_partition(1).query))
+
+        expected = qs.annotate(score=Score()).order_by("-score", "pk").first()
+        self.assertEqual(len(top), 1)
+        self.assertAlmostEqual(top[0].score, expected.score, places=5)
+
+        with self.assertRaises(ValueError):
+            Item.objects.for_partition(1)
+
+    def test_search_options(self):
+        def setting(name):
+            with connection.cursor() as cursor:
+                cursor.execute(f"SHOW {name}")
+                return cursor.fetchone()[0]
+
+        timeout, work_mem = setting("statement_timeout"), setting("work_mem")
+        qs = Item.objects.filter(description__term_search="music").search_options(
+            parallel_workers=0, statement_timeout_ms=1234, work_mem="5MB"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(list(qs))
+            self.assertTrue(qs.all().count())
+            self.assertTrue(list(qs.values_list("pk", flat=True).iterator()))
+        self.assertEqual(
+            sum("set_config" in query["sql"] for query in queries.captured_queries), 6
+        )
+        self.assertEqual(setting("statement_timeout"), timeout)
+        self.assertEqual(setting("work_mem"), work_mem)
+
+        with self.assertRaises(TypeError):
+            qs.search_options(workers=1)
+
+    def test_search_plan(self):
+        search = Item.objects.filter(description__term_search="music")
+        slow = search.annotate(sleep=RawSQL("pg_sleep(1)", []))
+        served = []
+
+        def receiver(step, **kwargs):
+            served.append(step)
+
+        search_plan_served.connect(receiver)
+        self.addCleanup(search_plan_served.disconnect, receiver)
+
+        plan = SearchPlan(
+            [("slow", slow), ("fast", search)],
+            budget_ms=2000,
+            step_timeout_ms=100,
+            cache_key="test-search-plan",
+        )
+        result = plan.execute()
+        self.assertEqual(result.step, "fast")
+        self.assertEqual(list(result), list(search))
+        self.assertLess(result.elapsed_ms, 1000)
+
+        result = SearchPlan(
+            [("slow", slow)], budget_ms=100, cache_key="test-search-plan"
+        ).execute()
+        self.assertEqual(result.step, "cache")
+        self.assertEqual(list(result), list(search))
+        self.assertEqual(served, ["fast", "cache"])
+
+        with self.assertRaises(OperationalError):
+            SearchPlan([("slow", slow)], budget_ms=100).execute()
+
+    def test_search_document(self):
+        ItemDocument.refresh()
+        self.assertEqual(ItemDocument.objects.count(), Item.objects.count())
+        document = ItemDocument.objects.get(source_id=99)
+        self.assertIn("Lorem Ipsum", document.reviews)
+
+        item = Item.objects.get(pk=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                Review.objects.create(item=item, review="Wonderful harpsichord")
+                Review.objects.create(item=item, review="Dreadful bassoon")
+            # the item is read from the foreign key, refreshed on commit
+            self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            list(Item.objects.filter(document__reviews__term_search="harpsichord")),
+            [item],
+        )
+        self.assertEqual(
+            list(
+                ItemDocument.objects.filter(
+                    Q(name__term_search=item.name.split()[0])
+                    & Q(reviews__term_search="bassoon")
+                ).values_list("source", flat=True)
+            ),
+            [item.pk],
+        )
+
+        # moved to another item
+        review = Review.objects.get(review="Dreadful bassoon")
+        with self.captureOnCommitCallbacks(execute=True):
+            review.item_id = 101
+            review.save()
+        self.assertNotIn("bassoon", ItemDocument.objects.get(pk=100).reviews)
+        self.assertIn("bassoon", ItemDocument.objects.get(pk=101).reviews)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+            item.name = "Renamed"
+            item.save()
+        document = ItemDocument.objects.get(pk=100)
+        self.assertEqual(document.name, "Renamed")
+        self.assertNotIn("bassoon", ItemDocument.objects.get(pk=101).reviews)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertFalse(ItemDocument.objects.filter(pk=100).exists())
+
+    def test_json_term_search(self):
+        Article.objects.create(
+            title="The Hobbit",
+            body="There and back again",
+            published=True,
+            metadata={"author": {"name": "J. R. R. Tolkien"}, "genre": "fantasy"},
+        )
+        Article.objects.create(
+            title="Dune",
+            body="Fear is the mind-killer",
+            published=True,
+            metadata={"author": {"name": "Frank Herbert"}, "genre": "science fiction"},
+        )
+
+        self.assertEqual(
+            Article.objects.get(metadata__json_term_search__genre="fantasy").title,
+            "The Hobbit",
+        )
+        self.assertEqual(
+            Article.objects.get(
+                metadata__json_term_search__author__name="herbert"
+            ).title,
+            "Dune",
+        )
+        self.assertFalse(
+            Article.objects.filter(metadata__json_term_search__genre="tolkien").exists()
+        )
+        # keys named like lookups are keys
+        for lookups, path in [
+            ({"metadata__json_term_search__in": "x"}, "metadata.in"),
+            ({"metadata__json_term_search__in__contains": "x"}, "metadata.in.contains"),
+            ({"metadata__json_term_search__exact__exact": "x"}, "metadata.exact"),
+        ]:
+            self.assertIn(
+                f"field => '{path}'", str(Article.objects.filter(**lookups).query)
+            )
+        with self.assertRaisesMessage(ValueError, "can only be searched"):
+            list(Article.objects.values("metadata__json_term_search__genre"))
+
+        index = BM25Index(
+            fields=["title"],
+            name="article_idx",
+            json_fields={"metadata": {"fast": False}},
+        )
+        with connection.schema_editor(collect_sql=True) as editor:
+            sql = str(index.create_sql(Article, editor))
+        self.assertIn('("id", "title", "metadata")', sql)
+        self.assertIn('json_fields=\'{"metadata": {"fast": false', sql)
+
+    def test_bm25_range_lookup(self):
+        qs = Item.objects.filter(description__term_search="music")
+        expected = set(qs.filter(rating__gte=1).values_list("pk", flat=True))
+
+        in_index = qs.filter(rating__bm25_range=(1, None))
+        self.assertIn(
+            "paradedb.range(field => %s, range => numrange",
+            in_index.query.sql_with_params()[0],
+        )
+        self.assertTrue(expected)
+        self.assertEqual(set(in_index.values_list("pk", flat=True)), expected)
+
+        self.assertEqual(
+            set(qs.filter(rating__bm25_range=(None, 1)).values_list("pk", flat=True)),
+            set(qs.filter(rating__lte=1).values_list("pk", flat=True)),
+        )
+
+    def test_bm25_filter_lookup_needs_indexed_field(self):
+        with self.assertRaisesMessage(ValueError, "Book.ext_id isn't indexed"):
+            str(Book.objects.filter(ext_id__bm25_term=1).query)
+        with self.assertRaisesMessage(ValueError, "Book.pages isn't indexed"):
+            str(Book.objects.filter(pages__bm25_range=(1, 10)).query)
+        # the key field is always indexed
+        str(Book.objects.filter(id__bm25_term=1).query)
+
+    def test_bm25_term_lookup(self):
+        item = Item.objects.filter(description__term_search="music").first()
+        qs = Item.objects.filter(
+            description__term_search="music", rating__bm25_term=item.rating
+        )
+        self.assertIn(item, qs)
+        self.assertEqual(
+            set(qs.values_list("rating", flat=True)),
+            {item.rating},
+        )
+
+    def test_term_set_lookup(self):
+        qs = Item.objects.filter(description__term_search="music")
+        pks = list(qs.values_list("pk", flat=True)[:3])
+        ratings = list(qs.values_list("rating", flat=True)[:3])
+
+        in_index = qs.filter(rating__term_set=ratings + [None])
+        self.assertIn("paradedb.term_set", str(in_index.query))
+        self.assertEqual(
+            set(in_index.values_list("pk", flat=True)),
+            set(qs.filter(rating__in=ratings).values_list("pk", flat=True)),
+        )
+        self.assertFalse(qs.filter(rating__term_set=[]).exists())
+
+        # __in filters, on request and only where it doesn't change the rows
+        self.assertNotIn("paradedb.term_set", str(qs.filter(pk__in=pks).query))
+        in_list = qs.filter(pk__in=pks).term_set_filters()
+        self.assertIn("paradedb.term_set", str(in_list.query))
+        self.assertEqual(set(in_list.values_list("pk", flat=True)), set(pks))
+        for unchanged in (
+            qs.filter(Q(pk__in=pks) | Q(rating__gte=4)),
+            qs.exclude(pk__in=pks),
+            qs.filter(name__in=["music"]),
+        ):
+            self.assertNotIn(
+                "paradedb.term_set", str(unchanged.term_set_filters().query)
+            )
+
+    def test_search_order_by_fast_field(self):
+        qs = Item.objects.filter(description__term_search="music").search_order_by(
+            "-rating"
+        )
+        self.assertEqual(
+            list(qs.values_list("rating", flat=True)),
+            sorted(qs.values_list("rating", flat=True), reverse=True),
+        )
+        plan = qs[:5].explain()
+        self.assertIn("TopN", plan)
+        self.assertNotIn("Sort Key", plan)
+        self.assertTrue(qs.search_order_pushdown)
+
+        qs = (
+            Item.objects.filter(description__term_search="music")
+            .annotate(score=Score())
+            .search_order_by("-score")
+        )
+        self.assertIn("TopN", qs[:5].explain())
+        self.assertTrue(qs.search_order_pushdown)
+
+    def test_search_order_by_not_fast(self):
+        # Postgres sorts keys which aren't fast fields of the index
+        search = Review.objects.filter(review__term_search="something")
+        for qs in (
+            search.search_order_by("-added"),
+            search.search_order_by("-pk", "item__rating"),
+            Item.objects.filter(description__term_search="music").search_order_by(
+                Lower("description")
+            ),
+        ):
+            with self.subTest(ordering=qs.query.order_by):
+                plan = qs[:5].explain()
+                self.assertNotIn("TopN", plan)
+                self.assertIn("Sort Key", plan)
+                self.assertFalse(qs.search_order_pushdown)
+        self.assertEqual(
+            list(search.search_order_by("-added")),
+            list(search.order_by("-added")),
+        )
+
+        qs = (
+            Item.objects.filter(description__term_search="music")
+            .search_order_by("-rating")
+            .order_by("pk")
+        )
+        self.assertFalse(qs.search_order_pushdown)
+
+    def test_collapse(self):
+        item = Item.objects.get(pk=100)
+        for text in ("something good", "something bad", "something else"):
+            Review.objects.create(item=item, review=text)
+
+        search = Review.objects.filter(review__term_search="something")
+        reviews = list(search.collapse("item", per_group=2))
+        per_item = {}
+        for review in reviews:
+            per_item[review.item_id] = per_item.get(review.item_id, 0) + 1
+        self.assertEqual(per_item[100], 2)
+        self.assertEqual(max(per_item.values()), 2)
+        self.assertEqual(len(reviews), search.collapse("item", per_group=2).count())
+        scores = [review.score for review in reviews]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        latest = search.collapse("item", order_by="-added")
+        self.assertEqual(len(latest), search.values("item").distinct().count())
+        self.assertIn(Review.objects.filter(item=item).latest("added"), list(latest))
+
+    def test_hits(self):
+        qs = (
+            Item.objects.filter(description__term_search="music")
+            .annotate(score=Score())
+            .search_order_by("-score")
+        )
+        with self.assertNumQueries(1):
+            hits = list(qs.hits("name", highlight="description"))
+            self.assertTrue(hits[0].name)
+            self.assertIn("<em>", hits[0].highlight)
+        self.assertEqual(
+            [hit.pk for hit in hits], list(qs.values_list("pk", flat=True))
+        )
+        self.assertEqual(hits[0].score, qs.first().score)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [hit.description for hit in hits],
+                list(qs.values_list("description", flat=True)),
+            )
+            self.assertIsInstance(hits[1].instance, Item)
+
+        # generated lazily, the instances are loaded per batch
+        hits = qs.hits(batch_size=2)
+        self.assertNotIsInstance(hits, list)
+        first, second, third = next(hits), next(hits), next(hits)
+        with self.assertNumQueries(1):
+            self.assertTrue(first.description and second.description)
+        with self.assertNumQueries(1):
+            self.assertTrue(third.description)
+
+    def test_from_index(self):
+        qs = (
+            Item.objects.filter(description__term_search="music")
+            .annotate(score=Score())
+            .from_index("pk", "rating", "score")
+        )
+        rows = list(qs)
+        self.assertTrue(rows)
+        self.assertEqual(set(rows[0]), {"pk", "rating", "score"})
+        self.assertIn("FastField", qs.explain())
+
+        with self.assertRaises(ValueError):
+            Review.objects.filter(review__term_search="something").from_index("added")
+        with self.assertRaises(ValueError):
+            Review.objects.order_by("added").from_index("pk")
+
+        qs = Item.objects.filter(description__term_search="music")
+        self.assertLessEqual({"pk", "rating"}, set(qs.from_index()[0]))
+        self.assertTrue(qs.order_by(F("rating").desc()).from_index("pk", "rating"))
+        with self.assertRaisesMessage(ValueError, "is a fast field"):
+            qs.order_by(Lower("name")).from_index("pk")
+
+    def test_more_like_this(self):
+        item = Item.objects.get(name="John Colpoys")
+        similar = list(
+            Item.objects.more_like_this(
+                item.pk, fields=["description"], min_term_freq=1, max_query_terms=25
+            )[:5]
+        )
+        self.assertTrue(similar)
+        self.assertNotIn(item, similar)
+        scores = [i.score for i in similar]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        self.assertIn(item, Item.objects.filter(MoreLikeThis(item.pk)))
+
+        with self.assertRaises(TypeError):
+            MoreLikeThis(item.pk, min_term_frequency=1)
+
+    def test_export(self):
+        qs = Item.objects.filter(description__term_search="music")
+        expected = set(qs.values_list("pk", flat=True))
+        self.assertTrue(expected)
+
+        rows = list(iter_rows(qs, "pk", "name", chunk_size=5))
+        self.assertEqual({pk for pk, _ in rows}, expected)
+
+        rows = list(iter_rows(qs, "pk", highlight="description"))
+        self.assertTrue(all("<em>" in hl.lower() for _, hl in rows))
+
+        out = io.StringIO()
+        export_csv(qs, out, "pk", "name")
+        reader = csv.reader(io.StringIO(out.getvalue()))
+        self.assertEqual(next(reader), ["pk", "name"])
+        self.assertEqual({int(row[0]) for row in reader}, expected)
+
+        out = io.StringIO()
+        export_jsonl(qs, out, "pk", "rating")
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual({line["pk"] for line in lines}, expected)
+
+        out = io.StringIO()
+        copy_to(qs, out, "pk", header=False)
+        self.assertEqual({int(pk) for pk in out.getvalue().split()}, expected)
+
+        # nothing can match, only the header is written
+        out = io.StringIO()
+        copy_to(qs.filter(pk__in=[]), out, "pk", highlight="description")
+        self.assertEqual(out.getvalue(), "pk,highlight\n")
+
+    def test_parse_search_lookup(self):
+        self.assertEqual(
+            Item.objects.filter(
+                description__parse_search='"Colpoys then attempted" AND crew'
+            ).count(),
+            1,
+        )
+        self.assertTrue(
+            Item.objects.filter(description__parse_search="name:Colpoys").exists()
+        )
+        with self.assertRaises(QueryStringError):
+            Item.objects.filter(description__parse_search="colpoys AND").count()
+        with self.assertRaises(QueryStringError):
+            Item.objects.filter(description__parse_search="price:12").count()
+
+    def test_normalized_search_terms(self):
+        qs1 = Item.objects.filter(description__term_search="Harry  Potter")
+        qs2 = Item.objects.filter(description__term_search="Harry Potter")
+        qs3 = Item.objects.filter(description__term_search="harry potter")
+        self.assertEqual(qs1.query.sql_with_params(), qs2.query.sql_with_params())
+        self.assertNotEqual(qs2.query.sql_with_params(), qs3.query.sql_with_params())
+        self.assertEqual(
+            Item.objects.filter(
+                description__phrase_search="Colpoys   THEN attempted to isolate his crew"
+            ).count(),
+            1,
+        )
+
+    def test_admin_search(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "admin")
+        )
+        response = self.client.get("/admin/testapp/item/", {"q": "music"})
+        self.assertEqual(response.status_code, 200)
+        changelist = response.context["cl"]
+        expected = Item.objects.filter(
+            Q(name__term_search="music") | Q(description__term_search="music")
+        )
+        self.assertEqual(changelist.result_count, expected.count())
+        self.assertIsNone(changelist.full_result_count)
+
+        scores = [item.search_score for item in changelist.result_list]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        # malformed query strings find nothing
+        with mock.patch.object(ItemAdmin, "search_lookup", "parse_search"):
+            response = self.client.get("/admin/testapp/item/", {"q": "music AND"})
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+        response = self.client.get("/admin/testapp/item/")
+        self.assertEqual(response.status_code, 200)
+
+        # the score doesn't survive the removal of duplicates, don't order by it
+        with mock.patch.object(ItemAdmin, "search_fields", ("name", "review__review")):
+            response = self.client.get("/admin/testapp/item/", {"q": "something"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(
+            "search_score", response.context["cl"].queryset.query.annotations
+        )
+
+    def test_benchmark_index(self):
+        with tempfile.NamedTemporaryFile("r", suffix=".json") as f:
+            call_command(
+                "benchmark_index",
+                model="testapp.Item",
+                field="description",
+                variants=["declared", "text not fast", "ngram 3-5"],
+                queries=8,
+                json=f.name,
+                stdout=io.StringIO(),
+            )
+            results = json.load(f)
+        self.assertEqual(results["field"], "description")
+        self.assertEqual(
+            list(results["variants"]), ["declared", "text not fast", "ngram 3-5"]
+        )
+        for result in results["variants"].values():
+            self.assertTrue(result["size_bytes"] > 0)
+            self.assertEqual(
+                set(result["mean_ms_by_query"]),
+                {"term", "phrase", "phrase_prefix", "fuzzy"},
+            )
+        # the declared index is back
+        self.assertTrue(Item.objects.filter(description__term_search="music").exists())
+
+    def test_profile_capture(self):
+        with profile.capture() as searches:
+            for word in ["music", "dance", "music"]:
+                list(Item.objects.filter(description__term_search=word)[:2])
+            list(Item.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(searches.count, 3)
+        [shape] = searches.shapes.values()
+        self.assertEqual(shape.count, 3)
+        self.assertIn("@@@ %s", shape.sql)
+        [call_site] = shape.call_sites
+        self.assertIn("tests.py", call_site)
+        self.assertIn("test_profile_capture", call_site)
+
+        def search_per_row():
+            for item in Item.objects.all()[:3]:
+                list(Review.objects.filter(review__term_search=item.name))
+
+        with self.assertWarns(profile.RepeatedSearchWarning):
+            with profile.capture(max_repeats=2):
+                search_per_row()
+        with self.assertRaises(profile.RepeatedSearchError):
+            with profile.capture(max_repeats=2, action="raise"):
+                search_per_row()
+        with profile.capture(max_repeats=3, action="raise"):
+            search_per_row()
+
+    @override_settings(DEBUG=True, PARADEDB_PROFILE_RAISE=True)
+    def test_profile_middleware(self):
+        def view(request):
+            list(Item.objects.filter(description__term_search="music")[:2])
+            return HttpResponse()
+
+        middleware = profile.SearchProfileMiddleware(view)
+        request = RequestFactory().get("/search/")
+        # logging is disabled in the test settings
+        with mock.patch.object(profile.logger, "debug") as debug:
+            middleware(request)
+        self.assertIn("1 ParadeDB queries", debug.call_args[0][-1])
+
+        with override_settings(PARADEDB_PROFILE_MAX_REPEATS=0):
+            with self.assertRaises(profile.RepeatedSearchError):
+                middleware(request)
+        with override_settings(DEBUG=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                profile.SearchProfileMiddleware(view)
+
+    def test_generate_corpus(self):
+        call_command(
+            "generate_corpus", books=200, vocabulary=1000, stdout=io.StringIO()
+        )
+        self.assertEqual(Book.objects.count(), 200)
+        self.assertTrue(BookReview.objects.exists())
+        titles = list(Book.objects.order_by("pk").values_list("title", flat=True))
+
+        call_command(
+            "generate_corpus", books=200, vocabulary=1000, stdout=io.StringIO()
+        )
+        self.assertEqual(
+            list(Book.objects.order_by("pk").values_list("title", flat=True)), titles
+        )
+
+        # appended rows are new text over the same vocabulary
+        call_command(
+            "generate_corpus",
+            books=100,
+            vocabulary=1000,
+            append=True,
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(Book.objects.count(), 300)
+        descriptions = dict(Book.objects.values_list("pk", "description"))
+        self.assertFalse(
+            {descriptions[pk] for pk in range(1, 101)}
+            & {descriptions[pk] for pk in range(201, 301)}
+        )
+        vocabulary = {word for pk in range(1, 201) for word in descriptions[pk].split()}
+        self.assertTrue(set(descriptions[201].split()) & vocabulary)
+
+        word = Book.objects.first().description.split()[0]
+        self.assertTrue(Book.objects.filter(description__term_search=word).exists())
+        Book.objects.create(title="new", ratings_count=0, ext_id=0)
+
+    def test_bm25_warmup(self):
+        indexes = {index.name for _, index in bm25_indexes()}
+        self.assertTrue({"item_idx", "review_idx", "book_idx"} <= indexes)
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP EXTENSION IF EXISTS pg_prewarm")
+        with self.assertRaisesMessage(CommandError, "CREATE EXTENSION pg_prewarm"):
+            call_command("bm25_warmup", stdout=io.StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION pg_prewarm")
+
+        blocks = prewarm(heap=False)
+        self.assertIn("item_idx", blocks)
+        self.assertNotIn("testapp_item", blocks)
+        self.assertIn("testapp_item", prewarm(models=[Item]))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as f:
+            for query in (
+                {"model": "testapp.Item", "filter": {"description__term_search": "a"}},
+                {"model": "testapp.Book", "filter": {"title__term_search": "x"}},
+            ):
+                f.write(json.dumps(query) + "\n")
+            f.flush()
+            out = io.StringIO()
+            call_command("bm25_warmup", queries=f.name, concurrency=2, stdout=out)
+            self.assertIn("Replayed 2 searches", out.getvalue())
+
+            f.write('{"model": "testapp.Nope", "filter": {}}\n')
+            f.flush()
+            err = io.StringIO()
+            with self.assertRaisesMessage(CommandError, "1 searches failed"):
+                call_command(
+                    "bm25_warmup", queries=f.name, stdout=io.StringIO(), stderr=err
+                )
+            self.assertIn('"testapp.Nope"', err.getvalue())
+            self.assertIn("LookupError", err.getvalue())
+
+        with self.assertLogs("paradedb.warmup", "WARNING") as logs:
+            [(query, exception)] = replay(
+                [{"model": "testapp.Item", "filter": {"nope__term_search": "a"}}]
+            )
+        self.assertEqual(query["filter"], {"nope__term_search": "a"})
+        self.assertIsInstance(exception, FieldError)
+        self.assertIn("nope__term_search", logs.output[0])
+
+
+class FederatedSearchCase(TransactionTestCase):
+    # the shards are searched from other threads, with their own connections,
+    # which only see committed rows
+    fixtures = ["testapp/test_data.json"]
+
+    def test_search(self):
+        query = {"description__term_search": "music"}
+        expected = list(
+            Item.objects.filter(**query)
+            .annotate(score=Score())
+            .order_by("-score")
+            .values_list("score", flat=True)[:3]
+        )
+        results = federated.search(Item, ["default", "default"], query, k=6)
+        self.assertFalse(results.partial)
+        self.assertEqual(
+            [item.score for item in results],
+            [score for score in expected for _ in range(2)],
+        )
+
+        results = federated.search(Item, ["default", "missing"], query, k=3)
+        self.assertTrue(results.partial)
+        self.assertEqual(list(results.errors), ["missing"])
+        self.assertEqual([item.score for item in results], expected)
+
+    def test_timeout(self):
+        search_shard = federated._search_shard
+
+        def slow_shard(model, alias, *args):
+            if alias == "slow":
+                time.sleep(1)
+                return []
+            return search_shard(model, alias, *args)
+
+        with mock.patch.object(federated, "_search_shard", slow_shard):
+            results = federated.search(
+                Item,
+                ["default", "slow"],
+                Q(description__term_search="music"),
+                k=3,
+                timeout=0.5,
+            )
+        self.assertIsInstance(results.errors["slow"], TimeoutError)
+        self.assertEqual(len(results), 3)
+
+
+class StandInCase(TestCase):
+    # the same searches as ParadeDBCase, on the SQLite stand-in
+    databases = {"standin"}
+    fixtures = ["testapp/test_data.json"]
+
+    def items(self, **lookups):
+        return Item.objects.using("standin").filter(**lookups)
+
+    def test_search_lookups(self):
+        text = "Colpoys then attempted to isolate his crew"
+        self.assertTrue(self.items(description__term_search=text).count() > 80)
+        self.assertEqual(self.items(description__phrase_search=text).count(), 1)
+        self.assertEqual(
+            self.items(description__phrase_search="Colpoys then attemp*").count(), 0
+        )
+        self.assertEqual(
+            self.items(
+                description__phrase_prefix_search="Colpoys then attemp*"
+            ).count(),
+            1,
+        )
+
+    def test_fuzzy_lookups(self):
+        self.assertEqual(
+            self.items(
+                description__fuzzy_phrase_search="Cololys attempte to isoate his crew"
+            ).count(),
+            1,
+        )
+        self.assertTrue(self.items(description__fuzzy_search="colpoyz").exists())
+        self.assertFalse(
+            self.items(
+                description__fuzzy_term_search=Fuzzy(
+                    "Colpyos", distance=1, transposition_cost_one=False
+                )
+            ).exists()
+        )
+        self.assertTrue(
+            self.items(
+                description__fuzzy_term_search=Fuzzy("Colpo", distance=0, prefix=True)
+            ).exists()
+        )
+        # an exact hit doesn't widen the search to distance 2
+        self.assertEqual(
+            self.items(
+                description__fuzzy_term_search=Fuzzy("Colpoys", adaptive=True)
+            ).count(),
+            1,
+        )
+        self.assertEqual(
+            self.items(
+                description__fuzzy_term_search=Fuzzy("Colpoys", distance=2)
+            ).count(),
+            11,
+        )
+        self.assertEqual(
+            self.items(
+                description__fuzzy_term_search=Fuzzy("crex", adaptive=True)
+            ).count(),
+            self.items(
+                description__fuzzy_term_search=Fuzzy("crex", distance=1)
+            ).count(),
+        )
+        self.assertEqual(
+            self.items(
+                description__fuzzy_term_search=Fuzzy("crex", adaptive=True, min_hits=10)
+            ).count(),
+            self.items(
+                description__fuzzy_term_search=Fuzzy("crex", distance=2)
+            ).count(),
+        )
+        self.assertTrue(
+            self.items(
+                description__fuzzy_term_search=Fuzzy("Cololys", adaptive=True)
+            ).exists()
+        )
+
+    def test_score_and_highlight(self):
+        items = list(
+            self.items(description__term_search="music")
+            .annotate(score=Score(), description_hl=Highlight("description"))
+            .order_by("-score")
+        )
+        self.assertTrue(items)
+        self.assertTrue(items[0].score >= items[-1].score > 0)
+        self.assertIn("<em>music</em>", items[0].description_hl.lower())
+
+        item = (
+            self.items(description__term_search="Fleischmann")
+            .annotate(description_hl=Highlight("description"))
+            .first()
+        )
+        self.assertIn("Charles Louis <em>Fleischmann</em>", item.description_hl)
+
+    def test_unsupported(self):
+        with self.assertRaises(NotSupportedError):
+            list(self.items(description__parse_search="music AND dance"))
+        with self.assertRaises(NotSupportedError):
+            list(self.items(name__bm25_term="music"))
+
+
+class QueryStringCase(SimpleTestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize("Harry  Potter"), "harry potter")
+        self.assertEqual(
+            normalize('title:Harry  AND  (potter OR "Half  Blood"~1)^2'),
+            'title:harry AND (potter OR "half blood"~1)^2',
+        )
+        self.assertEqual(normalize("+a -b* c~2"), "+a -b* c~2")
+        self.assertEqual(normalize("year:[2000 TO *}"), "year:[2000 TO *}")
+        self.assertEqual(normalize(r"desc\:desc"), r"desc\:desc")
+        self.assertEqual(normalize("Harry", lowercase=False), "Harry")
+
+    def test_normalize_terms(self):
+        self.assertEqual(normalize_terms(" cats  AND\tDogs "), "cats AND Dogs")
+        self.assertEqual(len(normalize_terms("a " * 128).split()), 128)
+        with self.assertRaises(QueryStringError):
+            normalize_terms("a " * 129)
+        with self.assertRaises(QueryStringError):
+            normalize_terms("a" * 5000)
+
+    def test_query_lookups(self):
+        # query_search and boost_search reject malformed queries before
+        # reaching the database, keeping the case of valid ones
+        sql, params = Item.objects.filter(
+            description__query_search="Running  Shoes"
+        ).query.sql_with_params()
+        self.assertIn("Running Shoes", params)
+        for lookups in [
+            {"description__query_search": "shoes AND"},
+            {"description__query_search": "(running shoes"},
+            {"description__boost_search": ("shoes OR", 2)},
+            {"description__term_search": "shoes " * 200},
+        ]:
+            with self.subTest(lookups=lookups), self.assertRaises(QueryStringError):
+                Item.objects.filter(**lookups).query.sql_with_params()
+
+    def test_parse(self):
+        query = parse('title:dragons AND -"fire ice" OR (a b)')
+        clauses = list(query)
+        self.assertEqual([c.field for c in clauses], ["title", None, None, None, None])
+        self.assertEqual(clauses[1].occur, "-")
+
+    def test_errors(self):
+        for text in [
+            "",
+            "a AND",
+            "OR b",
+            "(a",
+            "a)",
+            '"abc',
+            "[1 TO",
+            "a^x",
+            "((((((((((a))))))))))",
+            " ".join(["w"] * 500),
+        ]:
+            with self.subTest(text=text), self.assertRaises(QueryStringError):
+                parse(text)
+
+        with self.assertRaises(QueryStringError):
+            parse("author:x", fields={"title"})
+        self.assertEqual(
+            str(parse("metadata.author:x", fields={"metadata"})), "metadata.author:x"
+        )
+
+
+class BenchmarkCompileCase(SimpleTestCase):
+    def test_benchmark_compile(self):
+        with tempfile.NamedTemporaryFile("r", suffix=".json") as f:
+            call_command(
+                "benchmark_compile",
+                iterations=200,
+                samples=3,
+                warmup=50,
+                check=True,
+                json=f.name,
+                stdout=io.StringIO(),
+            )
+            results = json.load(f)
+        self.assertEqual(results["exact (baseline)"]["ratio"], 1)
+        self.assertIn("fuzzy_term_search", results)
+        for result in results.values():
+            self.assertTrue(result["total_us"] >= result["build_us"] > 0)
+            if result["max_ratio"] is not None:
+                self.assertTrue(result["ratio"] <= result["max_ratio"])
+
+
+@override_settings(
+    DATABASE_ROUTERS=["paradedb.routers.SearchRouter"],
+    PARADEDB_SEARCH_REPLICAS=["replica1", "replica2"],
+    PARADEDB_MAX_REPLICATION_LAG=5,
+)
+class SearchRouterCase(SimpleTestCase):
+    def setUp(self):
+        lags = {"replica1": 1.0, "replica2": 1.0}
+        patcher = mock.patch.object(
+            SearchRouter, "replication_lag", lambda self, alias: lags[alias]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.lags = lags
+
+    def test_search_routing(self):
+        self.assertEqual(Item.objects.all().db, "default")
+        self.assertIn(
+            Item.objects.filter(description__term_search="music").db,
+            {"replica1", "replica2"},
+        )
+        self.assertIn(Item.objects.annotate(score=Score()).db, {"replica1", "replica2"})
+        self.assertIn(
+            Review.objects.filter(
+                Q(pk=1) | Q(item__description__fuzzy_term_search="music")
+            ).db,
+            {"replica1", "replica2"},
+        )
+        self.assertEqual(
+            Item.objects.using("default").filter(description__term_search="x").db,
+            "default",
+        )
+
+        with use_primary():
+            self.assertEqual(
+                Item.objects.filter(description__term_search="music").db, "default"
+            )
+
+    def test_search_routing_pinned(self):
+        qs = Item.objects.filter(description__term_search="music")
+        alias = qs.db
+        self.assertEqual({qs.db for _ in range(20)}, {alias})
+        self.assertEqual(qs.order_by("pk").db, alias)
+        # writes aren't sent to the pinned replica
+        qs._for_write = True
+        self.assertEqual(qs.db, "default")
+
+    def test_replication_lag(self):
+        router = SearchRouter()
+        self.assertEqual(set(router.healthy_replicas()), {"replica1", "replica2"})
+
+        self.lags["replica1"] = 60.0
+        router = SearchRouter()
+        self.assertEqual(router.healthy_replicas(), ["replica2"])
+        self.assertEqual(router.db_for_read(Item, search=True), "replica2")
+
+        self.lags["replica2"] = None
+        router = SearchRouter()
+        self.assertEqual(router.db_for_read(Item, search=True), "default")
+        self.assertIsNone(router.db_for_read(Item))